@@ -158,12 +158,17 @@ class AppService(Construct):
                     secret=secret, field="db-password"
                 ),
             },
-            environment={"DEBUG": "False", "DB_HOST": "db.map.getogrand.media"},
+            environment={
+                "DEBUG": "False",
+                "DB_HOST": "db.map.getogrand.media",
+                # CloudFront와 ALB가 각각 X-Forwarded-For에 주소를 덧붙인다.
+                "TRUSTED_PROXY_HOPS": "2",
+            },
             working_directory="/app",
             command=[
                 "sh",
                 "-c",
-                "python manage.py migrate && gunicorn",
+                "python manage.py migrate_on_boot && gunicorn",
             ],
         )
         self.service = patterns.ApplicationLoadBalancedFargateService(
@@ -337,7 +342,13 @@ class HypermediaStack(Stack):
                             "ssmmessages:OpenDataChannel",
                         ],
                         resources=["*"],
-                    )
+                    ),
+                    # main.cdn.CloudFrontCdnBackend
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=["cloudfront:CreateInvalidation"],
+                        resources=["*"],
+                    ),
                 ]
             ),
         )
@@ -405,45 +416,176 @@ class HypermediaStack(Stack):
         )
         self.app_service.node.add_dependency(self.db_service)
 
+        self.cf_origin = cforigins.HttpOrigin(
+            domain_name="app.getogrand.media",
+            protocol_policy=cloudfront.OriginProtocolPolicy.MATCH_VIEWER,
+        )
+        # 같은 상태를 가리키는 쿼리를 엣지에서 하나로 모아 캐시 항목이 쪼개지지 않게 한다.
+        # 존재하지 않는 id 제거는 앱이 리다이렉트/HX-Replace-Url로 처리한다.
+        self.cf_canonical_query_function = cloudfront.Function(
+            scope=self,
+            id="CanonicalQueryFunction",
+            runtime=cloudfront.FunctionRuntime.JS_2_0,
+            code=cloudfront.FunctionCode.from_inline(
+                """
+function handler(event) {
+  var request = event.request;
+  var param = request.querystring.expanded_experience_ids;
+  // 다른 파라미터(/search의 q 등)는 그대로 두고, 캐시 키에 넣을지는 behavior의 캐시 정책이 정한다.
+  var querystring = request.querystring;
+  delete querystring.expanded_experience_ids;
+  if (param) {
+    var values = param.multiValue
+      ? param.multiValue.map(function (v) { return v.value; })
+      : [param.value];
+    var ids = values
+      .filter(function (v) { return /^\\d+$/.test(v); })
+      .map(Number)
+      .sort(function (a, b) { return a - b; })
+      .filter(function (v, i, arr) { return i === 0 || v !== arr[i - 1]; });
+    if (ids.length) {
+      querystring.expanded_experience_ids = {
+        value: String(ids[0]),
+        multiValue: ids.map(function (id) { return { value: String(id) }; }),
+      };
+    }
+  }
+  request.querystring = querystring;
+  // 오리진에는 Host가 오리진 도메인으로 바뀌어 가므로, 프로필을 고를 호스트를 따로 보낸다.
+  request.headers["x-forwarded-host"] = { value: request.headers.host.value };
+  return request;
+}
+"""
+            ),
+        )
+        # 캐시 키에는 넣지 않고 오리진에만 전달한다. 바쁠 때 캐시에 없는 prefetch는 오리진이 거절한다.
+        # X-Profile은 캐시 미스일 때만 오리진에 닿는다. 항상 프로파일하려면 /_profile/ 아래로 요청한다.
+        self.cf_origin_request_policy = cloudfront.OriginRequestPolicy(
+            scope=self,
+            id="OriginRequestPolicy",
+            header_behavior=cloudfront.OriginRequestHeaderBehavior.allow_list(
+                "Purpose",
+                "Sec-Purpose",
+                "X-Profile",
+            ),
+        )
+        # 토큰 형식(TimestampSigner)이 맞는 요청만 받아 접두사를 떼고 캐시 없이 오리진으로 보낸다.
+        # 서명은 오리진이 확인한다.
+        self.cf_profile_function = cloudfront.Function(
+            scope=self,
+            id="ProfileFunction",
+            runtime=cloudfront.FunctionRuntime.JS_2_0,
+            code=cloudfront.FunctionCode.from_inline(
+                """
+function handler(event) {
+  var request = event.request;
+  var token = request.headers["x-profile"];
+  if (!token || !/^profile:[0-9A-Za-z]+:[-\\w]{43}$/.test(token.value)) {
+    return { statusCode: 403, statusDescription: "Forbidden" };
+  }
+  request.uri = request.uri.replace(/^\\/_profile/, "") || "/";
+  request.headers["x-forwarded-host"] = { value: request.headers.host.value };
+  return request;
+}
+"""
+            ),
+        )
+        self.cf_search_behavior = cloudfront.BehaviorOptions(
+            origin=self.cf_origin,  # type: ignore
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+            cache_policy=cloudfront.CachePolicy(
+                scope=self,
+                id="SearchCachePolicy",
+                cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+                default_ttl=Duration.seconds(0),
+                enable_accept_encoding_brotli=True,
+                enable_accept_encoding_gzip=True,
+                header_behavior=cloudfront.CacheHeaderBehavior.allow_list(
+                    "HX-Target",
+                    "X-Forwarded-Host",
+                ),
+                query_string_behavior=cloudfront.CacheQueryStringBehavior.allow_list(
+                    "q",
+                ),
+            ),
+            compress=True,
+            function_associations=[
+                cloudfront.FunctionAssociation(
+                    event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                    function=self.cf_canonical_query_function,
+                )
+            ],
+            origin_request_policy=self.cf_origin_request_policy,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+        )
         self.cf_dist = cloudfront.Distribution(
             scope=self,
             id="CloudfrontDistribution",
             default_behavior=cloudfront.BehaviorOptions(
-                origin=cforigins.HttpOrigin(
-                    domain_name="app.getogrand.media",
-                    protocol_policy=cloudfront.OriginProtocolPolicy.MATCH_VIEWER,
-                ),  # type: ignore
+                origin=self.cf_origin,  # type: ignore
                 allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
                 cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD,
                 cache_policy=cloudfront.CachePolicy(
                     scope=self,
                     id="CachePolicy",
-                    cookie_behavior=cloudfront.CacheCookieBehavior.all(),
+                    cookie_behavior=cloudfront.CacheCookieBehavior.none(),
                     default_ttl=Duration.seconds(0),
                     enable_accept_encoding_brotli=True,
                     enable_accept_encoding_gzip=True,
+                    # 응답은 `Vary: HX-Target`만 가진다. 다른 htmx 헤더는 응답을 바꾸지 않는다.
+                    # 호스트마다 다른 프로필을 서빙하므로 함수가 넣은 X-Forwarded-Host도 키에 넣는다.
+                    # 아무 값이나 보내 캐시를 우회할 수 있으므로 X-Profile은 키에 넣지 않는다.
                     header_behavior=cloudfront.CacheHeaderBehavior.allow_list(
-                        "x-method-override",
-                        "Origin",
-                        "HX-Trigger",
-                        "HX-Request",
-                        "Host",
-                        "HX-Prompt",
                         "HX-Target",
-                        "HX-Boosted",
+                        "X-Forwarded-Host",
+                    ),
+                    query_string_behavior=cloudfront.CacheQueryStringBehavior.allow_list(
+                        "expanded_experience_ids",
                     ),
-                    query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
                 ),
                 compress=True,
-                origin_request_policy=None,
+                function_associations=[
+                    cloudfront.FunctionAssociation(
+                        event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                        function=self.cf_canonical_query_function,
+                    )
+                ],
+                origin_request_policy=self.cf_origin_request_policy,
                 viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
             ),
+            # 세션 쿠키와 쿼리가 필요한 admin은 캐시하지 않고 모두 전달한다.
+            # 검색은 기본 behavior가 버리는 q로 키를 나눈다. /_profile/ 아래는 프로파일용으로 캐시하지 않는다.
+            additional_behaviors={
+                "/search": self.cf_search_behavior,
+                "/p/*/search": self.cf_search_behavior,
+                "/_profile/*": cloudfront.BehaviorOptions(
+                    origin=self.cf_origin,  # type: ignore
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+                    cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+                    function_associations=[
+                        cloudfront.FunctionAssociation(
+                            event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                            function=self.cf_profile_function,
+                        )
+                    ],
+                    origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                ),
+                "/admin/*": cloudfront.BehaviorOptions(
+                    origin=self.cf_origin,  # type: ignore
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+                    cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+                    origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                ),
+            },
             certificate=acm.Certificate.from_certificate_arn(
                 scope=self,
                 id="CloudfrontCertificate",
                 certificate_arn="arn:aws:acm:us-east-1:730335367003:certificate/6a86ec89-eff9-4682-81c4-9e14972ef7f5",
             ),
-            domain_names=["getogrand.media"],
+            # 서브도메인은 호스트로 라우팅되는 프로필이다. 인증서가 *.getogrand.media도 포함해야 한다.
+            domain_names=["getogrand.media", "*.getogrand.media"],
             http_version=cloudfront.HttpVersion.HTTP2_AND_3,
             enable_ipv6=True,
             enable_logging=True,
@@ -464,6 +606,21 @@ class HypermediaStack(Stack):
             target=self.cf_alias_target,
             zone=self.public_hosted_zone,
         )
+        # app.getogrand.media 같은 명시적인 레코드가 와일드카드보다 우선한다.
+        self.cf_wildcard_a_record = route53.ARecord(
+            scope=self,
+            id="CloudfrontWildcardARecord",
+            record_name="*",
+            target=self.cf_alias_target,
+            zone=self.public_hosted_zone,
+        )
+        self.cf_wildcard_aaaa_record = route53.AaaaRecord(
+            scope=self,
+            id="CloudfrontWildcardAaaaRecord",
+            record_name="*",
+            target=self.cf_alias_target,
+            zone=self.public_hosted_zone,
+        )
 
 
 app = App()
@@ -461,7 +461,7 @@ class AppService(Service):
             command=[
                 "sh",
                 "-c",
-                "python manage.py collectstatic --no-input && python manage.py migrate && gunicorn -b 0.0.0.0:8000 --access-logfile '-' getogrand_hypermedia.wsgi",
+                "python manage.py collectstatic --no-input && python manage.py migrate_on_boot && gunicorn -b 0.0.0.0:8000 --access-logfile '-' getogrand_hypermedia.wsgi",
             ],
             discovery_name="app",
         )
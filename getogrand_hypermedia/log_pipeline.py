@@ -0,0 +1,155 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import random
+import traceback
+from collections import deque
+
+from gevent.monkey import get_original
+from gunicorn.glogging import Logger as GunicornLogger
+
+from main.metrics import Counter
+
+
+records = Counter(
+    "log_records_total",
+    "Log records by outcome (buffered, dropped when the buffer was full, sampled_out).",
+)
+
+
+def sample_rate(path: str) -> float:
+    """The `LOG_SAMPLE_RATES` entry of the longest prefix of `path`, or 1."""
+    from django.conf import settings
+
+    rates = getattr(settings, "LOG_SAMPLE_RATES", {}) if settings.configured else {}
+    matches = [prefix for prefix in rates if path.startswith(prefix)]
+    return rates[max(matches, key=len)] if matches else 1.0
+
+
+class LogRing:
+    """
+    A bounded buffer of rendered log lines, written to `fd` in batches by a native
+    thread so a slow stdout pipe never blocks the gevent hub. When the buffer is full
+    new lines are dropped and counted. The writer starts on the first line of each
+    process, since forked gunicorn workers do not inherit it.
+    """
+
+    def __init__(self, capacity: int, fd: int = 1, batch_size: int = 512):
+        self.capacity = capacity
+        self.fd = fd
+        self.batch_size = batch_size
+        self.lines: deque[str] = deque()
+        self.pid = None
+
+    def put(self, line: str):
+        if self.pid != os.getpid():
+            # fork 전에 쌓인 줄은 부모의 writer가 쓴다.
+            self.lines = deque()
+            self.pid = os.getpid()
+            # monkey patch된 threading은 greenlet이라, 쓰기가 막히면 hub도 같이 막힌다.
+            get_original("_thread", "start_new_thread")(self.run, ())
+        if len(self.lines) >= self.capacity:
+            records.inc(outcome="dropped")
+            return
+        self.lines.append(line)
+        records.inc(outcome="buffered")
+
+    def run(self):
+        sleep = get_original("time", "sleep")
+        pid = os.getpid()
+        while self.pid == pid:
+            if not self.write_batch():
+                sleep(0.2)
+
+    def write_batch(self) -> bool:
+        batch = []
+        # deque의 popleft는 GIL 아래에서 원자적이라 생산자와 락 없이 나눠 쓴다.
+        while self.lines and len(batch) < self.batch_size:
+            batch.append(self.lines.popleft())
+        if not batch:
+            return False
+        data = ("\n".join(batch) + "\n").encode()
+        try:
+            while data:
+                data = data[os.write(self.fd, data) :]
+        except OSError:
+            pass
+        return True
+
+    def flush(self):
+        """Writes every buffered line from the calling thread, e.g. on SIGTERM."""
+        while self.write_batch():
+            pass
+
+
+log_ring = LogRing(capacity=int(os.environ.get("LOG_BUFFER_SIZE", 10000)))
+atexit.register(log_ring.flush)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if request := getattr(record, "request", None):
+            entry["path"] = getattr(request, "path", None)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RingHandler(logging.Handler):
+    """Formats records (JSON by default) into `log_ring`, sampled by request path."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord):
+        request = getattr(record, "request", None)
+        path = getattr(request, "path", None)
+        if path is not None and random.random() >= sample_rate(path):
+            records.inc(outcome="sampled_out")
+            return
+        try:
+            log_ring.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class AccessLogger(GunicornLogger):
+    """Writes gunicorn's access log as JSON through `log_ring`, sampled by path, when
+    it goes to stdout (`accesslog = "-"`); a log file keeps gunicorn's format."""
+
+    def access(self, resp, req, environ, request_time):
+        if self.cfg.accesslog != "-":
+            return super().access(resp, req, environ, request_time)
+        path = environ.get("PATH_INFO", "")
+        if random.random() >= sample_rate(path):
+            records.inc(outcome="sampled_out")
+            return
+        try:
+            atoms = self.atoms(resp, req, environ, request_time)
+            entry = {
+                "time": datetime.datetime.now().astimezone().isoformat(),
+                "remote": atoms["h"],
+                "method": atoms["m"],
+                "path": path,
+                "query": atoms["q"],
+                "status": atoms["s"],
+                "bytes": atoms["B"],
+                "duration_ms": atoms["D"] / 1000,
+                "hx_target": environ.get("HTTP_HX_TARGET"),
+                "referer": atoms["f"],
+                "user_agent": atoms["a"],
+            }
+            log_ring.put(json.dumps(entry, ensure_ascii=False, default=str))
+        except Exception:
+            self.error(traceback.format_exc())
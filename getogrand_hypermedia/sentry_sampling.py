@@ -0,0 +1,97 @@
+import datetime
+import math
+import random
+import threading
+import time
+from typing import Any
+
+from sentry_sdk.types import Event as SentryEvent, Hint as SentryHint
+
+IGNORED_PATHS = ("/health", "/favicon.ico", "/admin/metrics")
+IGNORED_PREFIXES = ("/static/", "/__reload__/")
+# 4xx는 클라이언트 탓이라 정상 요청처럼 솎아낸다.
+HEALTHY_STATUSES = {
+    "ok",
+    "permission_denied",
+    "not_found",
+    "resource_exhausted",
+    "failed_precondition",
+    "unauthenticated",
+    "already_exists",
+    "invalid_argument",
+}
+
+
+class AdaptiveSampler:
+    """
+    Sentry sampling that keeps the number of sent healthy transactions per second
+    roughly constant instead of the share, so tracing costs less as load rises.
+
+    Head: `traces_sampler` traces every request except health checks and static
+    files, since whether a request fails or is slow is only known once it ends. Tail:
+    `before_send_transaction` sends every transaction that failed or took
+    `slow_seconds` or longer, and thins healthy fast ones down to
+    `healthy_per_second` of the estimated arrival rate. Profiles are sampled to
+    `profiles_per_second` the same way.
+    """
+
+    def __init__(
+        self,
+        healthy_per_second: float,
+        profiles_per_second: float,
+        slow_seconds: float,
+        window_seconds: float = 10,
+    ):
+        self.healthy_per_second = healthy_per_second
+        self.profiles_per_second = profiles_per_second
+        self.slow_seconds = slow_seconds
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.rate = 0.0
+        self.updated = time.monotonic()
+
+    def arrival_rate(self, arrive: bool = False) -> float:
+        """Requests per second, averaged exponentially over `window_seconds`."""
+        with self.lock:
+            now = time.monotonic()
+            self.rate *= math.exp((self.updated - now) / self.window_seconds)
+            self.updated = now
+            if arrive:
+                self.rate += 1 / self.window_seconds
+            return self.rate
+
+    def share(self, per_second: float) -> float:
+        rate = self.arrival_rate()
+        return 1.0 if rate <= per_second else per_second / rate
+
+    def traces_sampler(self, sampling_context: dict[str, Any]) -> float:
+        environ = sampling_context.get("wsgi_environ") or {}
+        path = environ.get("PATH_INFO", "")
+        if path in IGNORED_PATHS or path.startswith(IGNORED_PREFIXES):
+            return 0.0
+        self.arrival_rate(arrive=True)
+        return 1.0
+
+    def profiles_sampler(self, sampling_context: dict[str, Any]) -> float:
+        return self.share(self.profiles_per_second)
+
+    def before_send_transaction(
+        self, event: SentryEvent, hint: SentryHint
+    ) -> SentryEvent | None:
+        trace = event.get("contexts", {}).get("trace", {})
+        if trace.get("status", "ok") not in HEALTHY_STATUSES:
+            return event
+        if duration(event) >= self.slow_seconds:
+            return event
+        # 실패했거나 느린 요청은 모두 보내고, 빠르고 정상인 요청에만 초당 예산을 적용한다.
+        keep = self.share(self.healthy_per_second)
+        return event if random.random() < keep else None
+
+
+def duration(event: SentryEvent) -> float:
+    start, end = event.get("start_timestamp"), event.get("timestamp")
+    if isinstance(start, datetime.datetime) and isinstance(end, datetime.datetime):
+        return (end - start).total_seconds()
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+        return end - start
+    return 0.0
@@ -13,8 +13,6 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 import django_stubs_ext
-import sentry_sdk
-from sentry_sdk.types import Event as SentryEvent, Hint as SentryHint
 from django.core.exceptions import DisallowedHost
 
 from .utils import get_self_ip, read_secret_file, monkeypatch_for_template_debug
@@ -41,17 +39,33 @@ DEBUG: bool = eval(os.environ.get("DEBUG", "False"))
 TEMPLATE_DEBUG = DEBUG
 
 ALLOWED_HOSTS = (
-    [".localhost", "127.0.0.1", ".getogrand.media", "app"] + list(get_self_ip())
+    [".localhost", "127.0.0.1", ".getogrand.media", "app"]
+    + [ip for ip in get_self_ip() if ip]
     if not DEBUG
     else ["*"]
 )
+# CloudFront sends the viewer's host here, since it rewrites Host to the origin's; Caddy
+# sets it too. Profiles are routed by host (main.profiles)
+USE_X_FORWARDED_HOST = True
 
 if DEBUG:
     INTERNAL_IPS = ["127.0.0.1"] + [
         f"192.168.{a}.{b}" for a in range(1, 256) for b in range(1, 256)
     ]
 
+# Sentry tracing (getogrand_hypermedia.sentry_sampling): every request is traced, failed and
+# slow ones are all sent, and healthy fast ones are thinned to this many per second
+SENTRY_HEALTHY_TRACES_PER_SECOND = 0.05
+SENTRY_PROFILES_PER_SECOND = 0.02
+SENTRY_SLOW_TRANSACTION_SECONDS = 0.5
+
 if not DEBUG:
+    # 개발 서버에서는 sentry_sdk를 불러오지도 않는다.
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+    from sentry_sdk.types import Event as SentryEvent, Hint as SentryHint
+
+    from .sentry_sampling import AdaptiveSampler
 
     def before_send(event: SentryEvent, hint: SentryHint) -> SentryEvent | None:
         exc_info = hint.get("exc_info")
@@ -59,11 +73,20 @@ if not DEBUG:
             return
         return event
 
+    sentry_sampler = AdaptiveSampler(
+        healthy_per_second=SENTRY_HEALTHY_TRACES_PER_SECOND,
+        profiles_per_second=SENTRY_PROFILES_PER_SECOND,
+        slow_seconds=SENTRY_SLOW_TRANSACTION_SECONDS,
+    )
     sentry_sdk.init(
         dsn="https://0a1b9010ce08d2a62d63777fca3302cd@o303432.ingest.us.sentry.io/4507459219685376",
-        traces_sample_rate=1.0,
-        profiles_sample_rate=0.5,
+        traces_sampler=sentry_sampler.traces_sampler,
+        profiles_sampler=sentry_sampler.profiles_sampler,
         before_send=before_send,
+        before_send_transaction=sentry_sampler.before_send_transaction,
+        # 설치된 패키지마다 통합을 찾아 불러오는 대신(boto3 등) 쓰는 것만 켜서 기동을 줄인다.
+        auto_enabling_integrations=False,
+        integrations=[DjangoIntegration()],
     )
 
 # Application definition
@@ -79,6 +102,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "tailwind",
     "template_debug",
     "django_browser_reload",
@@ -89,20 +113,34 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "main.middlewares.HealthCheckMiddleware",
+    "main.middlewares.ProfilerMiddleware",
     "main.middlewares.DisableAdminI18nMiddleware",
+    "main.middlewares.SpeculativePrefetchMiddleware",
     "django.middleware.http.ConditionalGetMiddleware",
-    "compression_middleware.middleware.CompressionMiddleware",
+    "main.middlewares.StreamingCompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "main.middlewares.ServerTimingMiddleware",
+    "main.middlewares.ResponseCacheMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "main.middlewares.ScopedMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_browser_reload.middleware.BrowserReloadMiddleware",
 ]
 
+# Stateful middleware runs only under these path prefixes, at the position of
+# main.middlewares.ScopedMiddleware in MIDDLEWARE
+SCOPED_MIDDLEWARE = {
+    "/admin": [
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    ],
+}
+# admin.E408-E410 look for these in MIDDLEWARE; they run through SCOPED_MIDDLEWARE
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 ROOT_URLCONF = "getogrand_hypermedia.urls"
 
 TEMPLATES = [
@@ -123,17 +161,23 @@ TEMPLATES = [
 
 CSRF_TRUSTED_ORIGINS = ["https://localhost"] if DEBUG else ["https://getogrand.media"]
 
+# Records are rendered as JSON into a bounded buffer that a background thread writes to
+# stdout (getogrand_hypermedia.log_pipeline), as is gunicorn's access log
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
-    "handlers": {"console.debug": {"level": "DEBUG", "class": "logging.StreamHandler"}},
+    "handlers": {"ring": {"class": "getogrand_hypermedia.log_pipeline.RingHandler"}},
+    "root": {"level": "INFO", "handlers": ["ring"]},
     "loggers": {
         "django.db.backends": {
             "level": "DEBUG",
-            "handlers": ["console.debug"],
+            "handlers": ["ring"],
+            "propagate": False,
         },
     },
 }
+# Share of request logs kept, by longest matching path prefix
+LOG_SAMPLE_RATES = {"/health": 0.0, "/static/": 0.1}
 
 WSGI_APPLICATION = "getogrand_hypermedia.wsgi.application"
 ASGI_APPLICATION = "getogrand_hypermedia.asgi.application"
@@ -192,14 +236,31 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "www/static/"
+STATIC_EXPORT_ROOT = BASE_DIR / "www/export/"
+# Print/PDF exports of profiles, one immutable file per content version (main.print_export)
+PRINT_EXPORT_ROOT = STATIC_EXPORT_ROOT / "print"
+PRINT_EXPORT_URL = "/print/"
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+        "BACKEND": "main.storage.ImageOptimizingStaticFilesStorage",
     },
 }
+# Quality of the AVIF variants collectstatic adds next to PNGs and JPEGs (main.storage);
+# WebP variants are lossless
+STATIC_IMAGE_AVIF_QUALITY = 80
+# Static files the service worker precaches on install, as patterns on their unhashed
+# names in the manifest (main.service_worker)
+SERVICE_WORKER_PRECACHE = [
+    r"^css/dist/styles\.css$",
+    r"^fonts/[^/]+\.woff2$",
+    r"^js/[^/]+\.min\.js$",
+    r"^main/[^/]+\.svg$",
+    r"^images/icons/favicon-\d+x\d+\.png$",
+    r"^pwa/manifest\.json$",
+]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -208,3 +269,104 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # django-tailwind
 TAILWIND_APP_NAME = "theme"
+
+# CDN purge (main.cdn)
+CDN_PURGE_BACKENDS = (
+    {"locmem": {"BACKEND": "main.cdn.LocMemCdnBackend"}}
+    if DEBUG
+    else {
+        "static_export": {"BACKEND": "main.cdn.StaticExportCdnBackend"},
+        "cloudfront": {
+            "BACKEND": "main.cdn.CloudFrontCdnBackend",
+            "OPTIONS": {"distribution_id": "E1QKQUFSZNE1WL"},
+        },
+    }
+)
+CDN_PURGE_DEBOUNCE_SECONDS = 30
+CDN_PURGE_MAX_DELAY_SECONDS = 300
+
+# Origin response cache (main.middlewares.ResponseCacheMiddleware)
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE", "True") == "True"
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TTL_SECONDS = 3600
+RESPONSE_CACHE_STALE_TTL_SECONDS = 60 * 60 * 24
+RESPONSE_CACHE_LOCK_TIMEOUT_SECONDS = 10
+
+# One cache shared by every gunicorn worker of the task through an mmap file in /dev/shm
+# (main.shared_memory_cache); Docker's default /dev/shm is 64 MiB
+CACHES = {
+    "default": {
+        "BACKEND": "main.shared_memory_cache.SharedMemoryCache",
+        "LOCATION": os.environ.get("CACHE_LOCATION", "getogrand-hypermedia-cache"),
+        "OPTIONS": {"SIZE": 32 * 1024 * 1024, "BUCKETS": 65536},
+    }
+}
+
+# Template render timings (main.template_timing), exposed as `Server-Timing` and on /admin/metrics
+TEMPLATE_TIMING_ENABLED = os.environ.get("TEMPLATE_TIMING", "False") == "True"
+
+# Stream the index page so the document head is sent before the prefetch queries (main.streaming)
+INDEX_STREAMING_ENABLED = os.environ.get("INDEX_STREAMING", "True") == "True"
+
+# Speculative fragment prefetches that miss the response cache are shed when more requests
+# than this are in flight (main.middlewares)
+PREFETCH_MAX_IN_FLIGHT = 8
+
+# Browser cache lifetime of experience fragments, so a prefetched fragment is reused on click
+FRAGMENT_BROWSER_MAX_AGE_SECONDS = 60
+
+# Per-request query budgets declared with main.query_budget: share of requests recorded, and
+# whether a violation is "log"ged or "raise"d
+QUERY_BUDGET_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+QUERY_BUDGET_ACTION = "raise" if DEBUG else "log"
+
+# Profiles are routed by /p/<slug>/ or by Profile.host; other requests to / get this profile (main.profiles)
+DEFAULT_PROFILE_SLUG = os.environ.get("DEFAULT_PROFILE_SLUG", "getogrand")
+PROFILE_ROUTER_TTL_SECONDS = 60
+
+# Longer search queries are truncated (main.search)
+SEARCH_QUERY_MAX_LENGTH = 100
+
+# On-demand sampling profiler (main.profiler): CPU time between samples, profiles kept in
+# memory, lifetime of the X-Profile tokens issued on /admin/profiler and longest window
+PROFILER_INTERVAL_SECONDS = 0.005
+PROFILER_MAX_PROFILES = 20
+PROFILER_TOKEN_MAX_AGE_SECONDS = 600
+PROFILER_MAX_WINDOW_SECONDS = 300
+
+# Durable background jobs in Postgres (main.jobs): job worker greenlets started in each
+# gunicorn worker (0 leaves the jobs to `manage.py run_jobs`), jobs claimed per poll, idle
+# poll interval, how long a claimed job may run before another worker takes it over, and
+# the exponential retry backoff
+JOBS_WEB_WORKERS = int(os.environ.get("JOBS_WEB_WORKERS", "1"))
+JOBS_BATCH_SIZE = 10
+JOBS_POLL_INTERVAL_SECONDS = 1.0
+JOBS_LEASE_SECONDS = 300
+JOBS_RETRY_BASE_SECONDS = 5
+JOBS_RETRY_MAX_SECONDS = 3600
+
+# Seconds a fresh container may take from exec to its first served request
+# (`manage.py benchmark_startup`)
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "5"))
+
+# Where `sentry_tunnel` forwards envelopes; the load test points it at a local sink
+SENTRY_TUNNEL_UPSTREAM = os.environ.get(
+    "SENTRY_TUNNEL_UPSTREAM", "https://o303432.ingest.us.sentry.io"
+)
+SENTRY_TUNNEL_TIMEOUT_SECONDS = 5
+# Larger envelopes are refused with 413 before they are queued as a job row; browser
+# error events are a few KB
+SENTRY_TUNNEL_MAX_ENVELOPE_BYTES = 256 * 1024
+
+# Envelopes `sentry_tunnel` forwards per client (token bucket), how often one event is
+# forwarded within a sliding window, and how many clients and events are remembered
+# (main.sentry_tunnel)
+SENTRY_TUNNEL_RATE_PER_SECOND = 0.5
+SENTRY_TUNNEL_BURST = 10
+SENTRY_TUNNEL_DEDUP_WINDOW_SECONDS = 300
+SENTRY_TUNNEL_DEDUP_LIMIT = 3
+SENTRY_TUNNEL_MAX_KEYS = 10000
+# Proxies in front of the app that append to X-Forwarded-For: Caddy in compose (1), or
+# CloudFront and the ALB in cdk/cdkapp.py (2). Clients are told apart by the entry the
+# outermost of them added (main.sentry_tunnel)
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1"))
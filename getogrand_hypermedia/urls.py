@@ -18,7 +18,17 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from main.metrics import metrics_view
+from main.profiler import profile_download, profiler_view
+
 urlpatterns = [
+    path("admin/metrics", metrics_view, name="metrics"),
+    path("admin/profiler", profiler_view, name="profiler"),
+    path(
+        "admin/profiler/<int:profile_id>.txt",
+        profile_download,
+        name="profile_download",
+    ),
     path("admin/", admin.site.urls),
     path("__reload__/", include("django_browser_reload.urls")),
     path("", include("main.urls")),
@@ -1,5 +1,5 @@
+import os
 from collections import namedtuple
-import requests
 from socket import gethostname, gethostbyname
 
 
@@ -13,7 +13,8 @@ SelfIp = namedtuple("SelfIp", ["local", "external"])
 
 def get_self_ip() -> SelfIp:
     local = gethostbyname(gethostname())
-    external = requests.get("https://checkip.amazonaws.com").text.strip()
+    # 설정을 불러올 때마다 외부로 요청하지 않도록 외부 IP는 배포 환경이 넘겨준다.
+    external = os.environ.get("SELF_EXTERNAL_IP", "")
     return SelfIp(local=local, external=external)
 
 
@@ -6,7 +6,33 @@ wsgi_app = "getogrand_hypermedia.wsgi"
 bind = ["0.0.0.0:8000"]
 workers = 1
 accesslog = "-"
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" "%({hx-target}i)s" %(s)s %(b)s "%(f)s" "%(a)s" %(L)s'
+# access log은 JSON으로 버퍼에 쌓았다가 백그라운드 스레드가 stdout에 쓴다.
+logger_class = "getogrand_hypermedia.log_pipeline.AccessLogger"
 preload_app = True
 keepalive = 5
 worker_class = "gevent"
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    from main.jobs import worker as job_worker
+
+    # 작업 워커는 요청과 같은 hub의 greenlet으로 돈다.
+    job_worker.start(settings.JOBS_WEB_WORKERS)
+
+
+def worker_exit(server, worker):
+    from main.jobs import worker as job_worker
+
+    job_worker.stop()
+    # SIGTERM으로 종료될 때 버퍼에 남은 로그를 쓴다.
+    from getogrand_hypermedia.log_pipeline import log_ring
+
+    log_ring.flush()
+
+
+def on_exit(server):
+    from getogrand_hypermedia.log_pipeline import log_ring
+
+    log_ring.flush()
@@ -1,51 +1,155 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.forms.models import BaseInlineFormSet
 
-from .models import Profile, Experience, Duty, DutyItem, DutySubitem
+from .models import (
+    Profile,
+    Experience,
+    Duty,
+    DutyItem,
+    DutySubitem,
+    Job,
+    batched_touches,
+)
 
 
-class DutySubitemInline(admin.StackedInline):
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Edits one page of the related objects, chosen by `?<prefix>-page=`."""
+
+    per_page = 20
+    page_number: str | None = None
+
+    def get_queryset(self):
+        if not hasattr(self, "page"):
+            self.paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = self.paginator.get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+    @property
+    def page_range(self):
+        return self.paginator.get_elided_page_range(self.page.number)
+
+
+class PaginatedInlineMixin:
+    formset = PaginatedInlineFormSet
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(f"{formset.get_default_prefix()}-page")
+        return formset
+
+
+class BatchedTouchAdmin(admin.ModelAdmin):
+    """Saves a changed tree in one transaction, touching each parent once."""
+
+    def changeform_view(self, *args, **kwargs):
+        with transaction.atomic(), batched_touches():
+            return super().changeform_view(*args, **kwargs)
+
+    def delete_view(self, *args, **kwargs):
+        with transaction.atomic(), batched_touches():
+            return super().delete_view(*args, **kwargs)
+
+
+class DutySubitemInline(PaginatedInlineMixin, admin.StackedInline):
     model = DutySubitem
     show_change_link = True
+    template = "admin/main/edit_inline/paginated_stacked.html"
 
 
-class DutyItemInline(admin.StackedInline):
+class DutyItemInline(PaginatedInlineMixin, admin.StackedInline):
     model = DutyItem
     show_change_link = True
+    template = "admin/main/edit_inline/paginated_stacked.html"
 
 
-class DutyInline(admin.TabularInline):
+class DutyInline(PaginatedInlineMixin, admin.TabularInline):
     model = Duty
     fields = ["title", "start", "end"]
     show_change_link = True
+    template = "admin/main/edit_inline/paginated_tabular.html"
 
 
-class ExperienceInline(admin.StackedInline):
+class ExperienceInline(PaginatedInlineMixin, admin.StackedInline):
     model = Experience
     fields = ["company_name", "start", "end", "positions"]
     show_change_link = True
+    per_page = 10
+    template = "admin/main/edit_inline/paginated_stacked.html"
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(BatchedTouchAdmin):
+    list_display = ["full_name", "email", "slug", "host"]
+    search_fields = ["full_name", "email", "slug", "host"]
+    show_full_result_count = False
     inlines = [ExperienceInline]
 
 
 @admin.register(Experience)
-class ExperienceAdmin(admin.ModelAdmin):
+class ExperienceAdmin(BatchedTouchAdmin):
     list_display = ["company_name", "profile"]
+    list_select_related = ["profile"]
+    search_fields = ["company_name"]
+    autocomplete_fields = ["profile"]
+    show_full_result_count = False
     inlines = [DutyInline]
 
 
 @admin.register(Duty)
-class DutyAdmin(admin.ModelAdmin):
+class DutyAdmin(BatchedTouchAdmin):
     list_display = ["title", "experience"]
+    list_select_related = ["experience"]
+    search_fields = ["title"]
+    autocomplete_fields = ["experience"]
+    show_full_result_count = False
     inlines = [DutyItemInline]
 
 
 @admin.register(DutyItem)
-class DutyItemAdmin(admin.ModelAdmin):
+class DutyItemAdmin(BatchedTouchAdmin):
     list_display = ["title", "duty", "experience"]
+    list_select_related = ["duty__experience"]
+    search_fields = ["title"]
+    autocomplete_fields = ["duty"]
+    show_full_result_count = False
     inlines = [DutySubitemInline]
 
+    @admin.display(ordering="duty__experience__company_name")
     def experience(self, obj: DutyItem) -> str:
         return str(obj.duty.experience)
+
+
+@admin.register(DutySubitem)
+class DutySubitemAdmin(BatchedTouchAdmin):
+    list_display = ["title", "duty_item"]
+    list_select_related = ["duty_item"]
+    search_fields = ["title"]
+    autocomplete_fields = ["duty_item"]
+    show_full_result_count = False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["task", "state", "attempts", "run_at", "dedup_key", "created"]
+    list_filter = ["state", "task"]
+    readonly_fields = ["created", "modified", "locked_until", "last_error"]
+    show_full_result_count = False
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected jobs now")
+    def retry(self, request, queryset):
+        for job in queryset.filter(state=Job.State.FAILED):
+            try:
+                with transaction.atomic():
+                    Job.objects.filter(pk=job.pk).update(
+                        state=Job.State.QUEUED, attempts=0, run_at=timezone.now()
+                    )
+            except IntegrityError:
+                # 같은 dedup_key의 작업이 이미 대기 중이면 그 작업이 대신 실행된다.
+                pass
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+        # 요청 없이 도는 작업 워커에도 task가 등록되도록 불러온다.
+        from . import sentry_tunnel  # noqa: F401
+        from .gevent_db import ensure_cooperative_waits
+
+        ensure_cooperative_waits()
+
+        if settings.TEMPLATE_TIMING_ENABLED:
+            from .template_timing import install
+
+            install()
@@ -0,0 +1,228 @@
+import atexit
+import io
+import json
+import shutil
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+from .jobs import task
+
+
+def profile_key(profile_id: int) -> str:
+    return f"profile-{profile_id}"
+
+
+def experience_key(experience_id: int) -> str:
+    return f"experience-{experience_id}"
+
+
+def paths_for_keys(keys: Iterable[str]) -> list[str]:
+    """Paths of the profiles the keys belong to: `/p/<slug>/` and its query variants,
+    plus `/` for host-routed and default profiles. `/static/*` is never purged."""
+    from .models import Experience, Profile
+
+    ids = {"profile": set(), "experience": set()}
+    for key in keys:
+        kind, _, id = key.partition("-")
+        ids[kind].add(int(id))
+    profile_ids = ids["profile"] | set(
+        Experience.objects.filter(pk__in=ids["experience"]).values_list(
+            "profile_id", flat=True
+        )
+    )
+
+    paths = set()
+    for slug, host in Profile.objects.filter(pk__in=profile_ids).values_list(
+        "slug", "host"
+    ):
+        paths.update([f"/p/{slug}/", f"/p/{slug}/?*"])
+        # 경로 기반 무효화는 호스트를 구분하지 못하므로, 호스트로 서빙되는 프로필은 `/`도 무효화한다.
+        if host or slug == settings.DEFAULT_PROFILE_SLUG:
+            paths.update(["/", "/?*"])
+    return sorted(paths)
+
+
+class BaseCdnBackend:
+    def __init__(self, **options):
+        self.options = options
+
+    def purge(self, keys: list[str], paths: list[str]) -> None:
+        raise NotImplementedError
+
+
+class LocMemCdnBackend(BaseCdnBackend):
+    """Records purges in memory instead of calling a CDN. For local use and tests."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.purges: list[tuple[list[str], list[str]]] = []
+
+    def purge(self, keys: list[str], paths: list[str]) -> None:
+        self.purges.append((keys, paths))
+
+
+class CloudFrontCdnBackend(BaseCdnBackend):
+    """CloudFront has no surrogate keys, so keys are purged through their paths."""
+
+    @cached_property
+    def client(self):
+        import boto3
+
+        return boto3.client("cloudfront")
+
+    def purge(self, keys: list[str], paths: list[str]) -> None:
+        if not paths:
+            return
+        self.client.create_invalidation(
+            DistributionId=self.options["distribution_id"],
+            InvalidationBatch={
+                "Paths": {"Quantity": len(paths), "Items": paths},
+                "CallerReference": f"{time.time_ns()}",
+            },
+        )
+
+
+class StaticExportCdnBackend(BaseCdnBackend):
+    """Deletes `export_static` output for the purged keys so the proxy falls back to the app.
+    Keys of profiles other than the exported one are ignored."""
+
+    def purge(self, keys: list[str], paths: list[str]) -> None:
+        root = Path(settings.STATIC_EXPORT_ROOT)
+        try:
+            manifest = json.loads((root / "manifest.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        exported = {profile_key(manifest.get("profile"))} | {
+            experience_key(id) for id in manifest.get("experiences", {})
+        }
+        keys = [key for key in keys if key in exported]
+        for key in keys:
+            if key.startswith("profile-"):
+                # 모든 fragment가 경력 목록을 담고 있으므로 전부 지우고, 다음 export에서 다시 만든다.
+                shutil.rmtree(root / "fragments", ignore_errors=True)
+                (root / "manifest.json").unlink(missing_ok=True)
+            elif key.startswith("experience-"):
+                for suffix in ["expand", "details"]:
+                    shutil.rmtree(
+                        root / "fragments" / f"{key}-{suffix}", ignore_errors=True
+                    )
+        if keys:
+            for name in ["index.html", "index.html.br", "index.html.gz"]:
+                (root / name).unlink(missing_ok=True)
+
+
+class PurgeQueue:
+    """Collects surrogate keys and queues one purge job per backend for them once edits
+    have been quiet for `debounce` seconds, or at most `max_delay` seconds after the
+    first key."""
+
+    def __init__(self, debounce: float, max_delay: float):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.keys: set[str] = set()
+        self.first_enqueued_at: float | None = None
+        self.timer: threading.Timer | None = None
+
+    @cached_property
+    def backends(self) -> dict[str, BaseCdnBackend]:
+        return {
+            name: import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+            for name, config in settings.CDN_PURGE_BACKENDS.items()
+        }
+
+    def enqueue(self, keys: Iterable[str]) -> None:
+        with self.lock:
+            self.keys.update(keys)
+            now = time.monotonic()
+            if self.first_enqueued_at is None:
+                self.first_enqueued_at = now
+            if self.timer is not None:
+                self.timer.cancel()
+            delay = min(self.debounce, self.first_enqueued_at + self.max_delay - now)
+            self.timer = threading.Timer(max(delay, 0), self.flush_in_thread)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush_in_thread(self) -> None:
+        # 타이머 스레드마다 ORM이 새 DB 연결을 열므로 끝나면 닫는다.
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self) -> None:
+        with self.lock:
+            keys, self.keys = sorted(self.keys), set()
+            self.first_enqueued_at = None
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not keys:
+            return
+        # 백엔드마다 따로 넣어서 실패한 백엔드만 재시도한다.
+        for name in self.backends:
+            purge.enqueue(backend=name, keys=keys)
+
+
+purge_queue = PurgeQueue(
+    debounce=settings.CDN_PURGE_DEBOUNCE_SECONDS,
+    max_delay=settings.CDN_PURGE_MAX_DELAY_SECONDS,
+)
+# 프로세스가 종료될 때 아직 디바운스 중인 purge를 잃지 않도록 한다.
+atexit.register(purge_queue.flush)
+
+
+@task("cdn_purge", max_attempts=8)
+def purge(backend: str, keys: list[str]):
+    purge_queue.backends[backend].purge(keys, paths_for_keys(keys))
+
+
+def static_export_backends() -> list[str]:
+    return [
+        name
+        for name, backend in purge_queue.backends.items()
+        if isinstance(backend, StaticExportCdnBackend)
+    ]
+
+
+def schedule_static_export(profile_ids: Iterable[int]):
+    """Queues a re-export when one of the changed profiles is the exported one (the
+    profile served at `/`), to replace the files its purge deletes. Purges are queued
+    at most `CDN_PURGE_MAX_DELAY_SECONDS` after an edit, so the export starts after
+    that."""
+    from .models import Profile
+
+    if not static_export_backends():
+        return
+    if Profile.objects.filter(
+        pk__in=profile_ids, slug=settings.DEFAULT_PROFILE_SLUG
+    ).exists():
+        refresh_static_export.enqueue(
+            dedup_key="static_export", delay=settings.CDN_PURGE_MAX_DELAY_SECONDS
+        )
+
+
+@task("static_export", max_attempts=3)
+def refresh_static_export():
+    from .models import Job
+
+    # 아직 남은 purge가 나중에 돌면 새로 내보낸 파일을 지우므로, 그 뒤로 미룬다.
+    if (
+        Job.objects.filter(task=purge.name, args__backend__in=static_export_backends())
+        .exclude(state=Job.State.FAILED)
+        .exists()
+    ):
+        refresh_static_export.enqueue(
+            dedup_key="static_export", delay=settings.CDN_PURGE_DEBOUNCE_SECONDS
+        )
+        return
+    call_command("export_static", stdout=io.StringIO())
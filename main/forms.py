@@ -1,10 +1,20 @@
+from urllib.parse import urlencode
+
 from django import forms
 
 from .models import Profile
 
 
+class CanonicalMultipleChoiceField(forms.TypedMultipleChoiceField):
+    """Drops unknown choices instead of failing, and cleans to sorted unique values."""
+
+    def clean(self, value):
+        value = [v for v in value or [] if self.valid_value(v)]
+        return sorted(set(super().clean(value)))
+
+
 class ProfileForm(forms.Form):
-    expanded_experience_ids = forms.TypedMultipleChoiceField(
+    expanded_experience_ids = CanonicalMultipleChoiceField(
         coerce=int,
         widget=forms.SelectMultiple(attrs={"class": "hidden", "hx-swap-oob": "true"}),
         required=False,
@@ -16,3 +26,13 @@ class ProfileForm(forms.Form):
             (experience.id, experience.company_name)
             for experience in profile.experience_set.all()
         ]
+
+    def canonical_query_string(self) -> str:
+        expanded_experience_ids = (
+            self.cleaned_data.get("expanded_experience_ids", [])
+            if self.is_bound
+            else []
+        )
+        return urlencode(
+            {"expanded_experience_ids": expanded_experience_ids}, doseq=True
+        )
@@ -0,0 +1,31 @@
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_cooperative_waits() -> str:
+    """
+    Makes psycopg wait for libpq through gevent's hub when gevent has patched `select`,
+    and returns the name of the wait function in use.
+
+    psycopg picks its wait function once, at import. `wait_c` polls the socket in C,
+    so a slow query would block every greenlet of the worker. psycopg avoids it only
+    if gevent patched `select` before psycopg was imported, which holds under
+    gunicorn.conf.py but not for every import order; this enforces it. An explicit
+    PSYCOPG_WAIT_FUNC is left alone.
+    """
+    from psycopg import waiting
+
+    monkey = sys.modules.get("gevent.monkey")
+    if (
+        monkey is not None
+        and monkey.is_module_patched("select")
+        and "PSYCOPG_WAIT_FUNC" not in os.environ
+        and waiting.wait is getattr(waiting, "wait_c", None)
+    ):
+        # wait_select는 호출할 때마다 select.select를 찾으므로 gevent 버전을 쓴다.
+        waiting.wait = waiting.wait_select
+        logger.info("psycopg imported before gevent patched select, using wait_select")
+    return waiting.wait.__name__
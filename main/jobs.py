@@ -0,0 +1,195 @@
+import logging
+import random
+import threading
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .metrics import Counter
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+jobs = Counter(
+    "jobs_total",
+    "Background jobs by task and outcome "
+    "(enqueued, deduplicated, succeeded, retried, failed)",
+)
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    function: Callable[..., None]
+    max_attempts: int
+
+    def __call__(self, **kwargs):
+        return self.function(**kwargs)
+
+    def enqueue(self, dedup_key: str | None = None, delay: float = 0, **kwargs) -> bool:
+        """
+        Queues `function(**kwargs)`; `kwargs` must be JSON serialisable. Inside a
+        transaction the job is only visible once it commits. Returns False when a job
+        with the same `dedup_key` is already queued, since that one will do the work.
+        """
+        job = Job(
+            task=self.name,
+            args=kwargs,
+            dedup_key=dedup_key,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            if dedup_key is None:
+                raise
+            jobs.inc(task=self.name, outcome="deduplicated")
+            return False
+        jobs.inc(task=self.name, outcome="enqueued")
+        return True
+
+
+tasks: dict[str, Task] = {}
+
+
+def task(name: str, max_attempts: int = 5) -> Callable[[Callable], Task]:
+    """Registers a function as a task that workers run by `name`."""
+
+    def decorator(function: Callable[..., None]) -> Task:
+        tasks[name] = Task(name=name, function=function, max_attempts=max_attempts)
+        return tasks[name]
+
+    return decorator
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so failures of one upstream spread out."""
+    delay = min(
+        settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def claim(limit: int) -> list[Job]:
+    """
+    Takes up to `limit` due jobs, and running jobs whose worker let the lease expire,
+    for `JOBS_LEASE_SECONDS`. `SKIP LOCKED` lets any number of workers poll the table
+    without waiting on each other's rows.
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+    with transaction.atomic():
+        claimed = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(state=Job.State.QUEUED, run_at__lte=now)
+                | Q(state=Job.State.RUNNING, locked_until__lt=now)
+            )
+            .order_by("run_at")[:limit]
+        )
+        Job.objects.filter(pk__in=[job.pk for job in claimed]).update(
+            state=Job.State.RUNNING,
+            locked_until=locked_until,
+            attempts=F("attempts") + 1,
+        )
+    for job in claimed:
+        job.state = Job.State.RUNNING
+        job.locked_until = locked_until
+        job.attempts += 1
+    return claimed
+
+
+def run(job: Job):
+    # lease가 만료되어 다른 워커가 가져간 작업의 결과는 기록하지 않는다.
+    owned = Job.objects.filter(pk=job.pk, locked_until=job.locked_until)
+    try:
+        if job.task not in tasks:
+            raise LookupError(f"unknown task: {job.task}")
+        tasks[job.task](**job.args)
+    except Exception:
+        last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.exception("job failed: task=%s id=%s", job.task, job.pk)
+            owned.update(
+                state=Job.State.FAILED, locked_until=None, last_error=last_error
+            )
+            jobs.inc(task=job.task, outcome="failed")
+            return
+        logger.warning(
+            "job will be retried: task=%s id=%s attempts=%s",
+            job.task,
+            job.pk,
+            job.attempts,
+            exc_info=True,
+        )
+        run_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        try:
+            with transaction.atomic():
+                owned.update(
+                    state=Job.State.QUEUED,
+                    run_at=run_at,
+                    locked_until=None,
+                    last_error=last_error,
+                )
+        except IntegrityError:
+            # 그 사이 같은 dedup_key로 들어온 작업이 대신 실행된다.
+            owned.delete()
+        jobs.inc(task=job.task, outcome="retried")
+        return
+    owned.delete()
+    jobs.inc(task=job.task, outcome="succeeded")
+
+
+class Worker:
+    """Polls for jobs on `threads` threads, which are greenlets under gunicorn's gevent
+    workers. Each thread claims a batch at a time, so a slow job only delays its own
+    batch."""
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+
+    def run_once(self) -> int:
+        close_old_connections()
+        claimed = claim(self.batch_size)
+        for job in claimed:
+            if self.stopping.is_set():
+                # 남은 작업은 lease가 만료된 뒤 다른 워커가 가져간다.
+                break
+            run(job)
+        return len(claimed)
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("job worker failed to poll")
+                claimed = 0
+            if not claimed:
+                self.stopping.wait(self.poll_interval)
+
+    def start(self, threads: int):
+        for i in range(threads):
+            threading.Thread(
+                target=self.run, name=f"job-worker-{i}", daemon=True
+            ).start()
+
+    def stop(self):
+        self.stopping.set()
+
+
+worker = Worker(
+    batch_size=settings.JOBS_BATCH_SIZE,
+    poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,98 @@
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a resume tree per size with `seed_profile_tree` and count the queries of "
+        "every admin changelist and change page. Fails when a count grows with the "
+        "tree or exceeds --max-queries. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[3, 12],
+            help="rows per level of each seeded tree",
+        )
+        parser.add_argument("--max-queries", type=int, default=12)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, sizes: list[int], max_queries: int, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_superuser(
+                username="benchmark-admin-queries", password=None
+            )
+            client = Client()
+            client.force_login(user)
+            counts: dict[str, list[int]] = {}
+            for size in sizes:
+                for page, count in self.measure(client, size).items():
+                    counts.setdefault(page, []).append(count)
+            # 시드한 트리와 사용자를 남기지 않는다.
+            transaction.set_rollback(True)
+
+        growing = [page for page, values in counts.items() if len(set(values)) > 1]
+        over = [page for page, values in counts.items() if max(values) > max_queries]
+        if options["json"]:
+            self.stdout.write(json.dumps({"sizes": sizes, "queries": counts}, indent=2))
+        else:
+            for page, values in counts.items():
+                self.stdout.write(
+                    f"{page:>24}: " + ", ".join(str(value) for value in values)
+                )
+        if growing or over:
+            raise CommandError(
+                f"query counts grow with the tree: {growing or '-'}; "
+                f"over {max_queries}: {over or '-'}"
+            )
+
+    def measure(self, client: Client, size: int) -> dict[str, int]:
+        email = f"admin-queries-{size}@example.com"
+        call_command(
+            "seed_profile_tree",
+            email=email,
+            slug=f"admin-queries-{size}",
+            experiences=size,
+            duties=size,
+            items=size,
+            subitems=size,
+            force=True,
+            stdout=io.StringIO(),
+        )
+        profile = Profile.objects.get(email=email)
+        experience = profile.experience_set.first()
+        duty = experience.duty_set.first()
+        item = duty.dutyitem_set.first()
+        subitem = item.dutysubitem_set.first()
+
+        counts = {}
+        for obj in [profile, experience, duty, item, subitem]:
+            model = obj._meta.model_name
+            for page, url in [
+                (f"{model} changelist", reverse(f"admin:main_{model}_changelist")),
+                (
+                    f"{model} change",
+                    reverse(f"admin:main_{model}_change", args=[obj.pk]),
+                ),
+            ]:
+                # 첫 요청은 ContentType 같은 프로세스 캐시를 채우느라 쿼리가 더 많다.
+                client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+                counts[page] = len(queries)
+        return counts
@@ -0,0 +1,130 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# gevent가 psycopg보다 먼저 패치해야 하므로 gunicorn처럼 새 프로세스에서 돌린다.
+CHILD = """
+from gevent import monkey
+
+monkey.patch_all()
+
+import json, sys
+import django
+
+django.setup()
+
+from main.management.commands.benchmark_db_concurrency import run_queries
+
+print(json.dumps(run_queries(int(sys.argv[1]), float(sys.argv[2]))))
+"""
+
+
+def run_queries(concurrency: int, seconds: float) -> dict:
+    """Times one `pg_sleep(seconds)` and then `concurrency` of them in parallel
+    greenlets, each on its own connection, while measuring how late the hub runs a
+    10ms timer."""
+    import gevent
+    from django.db import connection
+    from psycopg import waiting
+
+    def query():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(%s)", [seconds])
+        finally:
+            connection.close()
+
+    lag = 0.0
+
+    def ticker():
+        nonlocal lag
+        while True:
+            start = time.perf_counter()
+            gevent.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    start = time.perf_counter()
+    gevent.spawn(query).get()
+    single = time.perf_counter() - start
+
+    tick = gevent.spawn(ticker)
+    start = time.perf_counter()
+    gevent.joinall([gevent.spawn(query) for _ in range(concurrency)], raise_error=True)
+    parallel = time.perf_counter() - start
+    tick.kill()
+
+    return {
+        "wait": waiting.wait.__name__,
+        "concurrency": concurrency,
+        "single_s": single,
+        "parallel_s": parallel,
+        "max_hub_lag_s": lag,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that Postgres queries yield to the gevent hub: run N slow queries "
+        "(pg_sleep) in parallel greenlets under gevent monkey patching, as gunicorn "
+        "does, and fail unless the wall time stays near that of a single query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--seconds", type=float, default=0.5)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.5,
+            help="allowed ratio of the parallel wall time to a single query",
+        )
+        parser.add_argument(
+            "--wait-func",
+            help="force a psycopg wait function (PSYCOPG_WAIT_FUNC), e.g. wait_c "
+            "to see queries serialise",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(
+        self,
+        *args,
+        concurrency: int,
+        seconds: float,
+        tolerance: float,
+        wait_func: str | None,
+        **options,
+    ):
+        env = dict(os.environ)
+        if wait_func:
+            env["PSYCOPG_WAIT_FUNC"] = wait_func
+        child = subprocess.run(
+            [sys.executable, "-c", CHILD, str(concurrency), str(seconds)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode != 0:
+            raise CommandError(f"benchmark process failed:\n{child.stderr}")
+        # 로그도 stdout으로 나가므로 마지막 줄이 결과다.
+        report = json.loads(child.stdout.strip().splitlines()[-1])
+        report["ratio"] = report["parallel_s"] / report["single_s"]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"wait={report['wait']}: 1 query {report['single_s']:.3f}s, "
+                f"{concurrency} in parallel {report['parallel_s']:.3f}s "
+                f"(x{report['ratio']:.2f}), max hub lag {report['max_hub_lag_s']:.3f}s"
+            )
+        if report["ratio"] > tolerance:
+            raise CommandError(
+                f"queries did not run concurrently: x{report['ratio']:.2f} of a "
+                f"single query, tolerance x{tolerance}"
+            )
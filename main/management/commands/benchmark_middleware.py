@@ -0,0 +1,93 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from main.models import Experience
+
+from .benchmark_ttfb import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request time of public routes with every middleware in "
+        "MIDDLEWARE (flat) against the route-scoped chain. The origin response cache "
+        "is disabled so every request reaches the view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, requests: int, **options):
+        experience = Experience.objects.filter(
+            profile__slug=settings.DEFAULT_PROFILE_SLUG
+        ).first()
+        routes = {"search": ("/search", {})}
+        if experience is not None:
+            routes["fragment"] = (
+                "/",
+                {
+                    "HX-Request": "true",
+                    "HX-Target": f"experience-{experience.id}-details",
+                },
+            )
+
+        scoped = [
+            m
+            for m in settings.MIDDLEWARE
+            if m != "main.middlewares.ResponseCacheMiddleware"
+        ]
+        flat = []
+        for middleware in scoped:
+            if middleware == "main.middlewares.ScopedMiddleware":
+                flat.extend(
+                    m
+                    for paths in settings.SCOPED_MIDDLEWARE.values()
+                    for m in paths
+                    if m not in flat
+                )
+            else:
+                flat.append(middleware)
+
+        report = {}
+        for mode, middleware in [("flat", flat), ("scoped", scoped)]:
+            with override_settings(MIDDLEWARE=middleware):
+                client = Client()
+                report[mode] = {
+                    name: self.measure(client, path, headers, requests)
+                    for name, (path, headers) in routes.items()
+                }
+        report["saved_us_per_request"] = {
+            name: report["flat"][name]["mean_us"] - report["scoped"][name]["mean_us"]
+            for name in routes
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for name in routes:
+            self.stdout.write(
+                f"{name:>9}: flat {report['flat'][name]['mean_us']:.0f}us "
+                f"scoped {report['scoped'][name]['mean_us']:.0f}us "
+                f"saved {report['saved_us_per_request'][name]:.0f}us/request, "
+                f"Vary flat={report['flat'][name]['vary']!r} "
+                f"scoped={report['scoped'][name]['vary']!r}"
+            )
+
+    def measure(self, client: Client, path: str, headers: dict, requests: int) -> dict:
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(path, headers=headers)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            timings.append(time.perf_counter() - start)
+        return {
+            "mean_us": statistics.fmean(timings) * 1e6,
+            "p50_us": percentile(timings, 50) * 1e6,
+            "vary": response.get("Vary", ""),
+        }
@@ -0,0 +1,79 @@
+import json
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from main.models import Experience, Profile
+from main.search import search_query
+
+from .benchmark_ttfb import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure search latency for profiles of growing size. Seeds a throwaway "
+        "profile per size with `seed_profile_tree`, and reports per-size percentiles "
+        "and whether the GIN index was used. Requires PostgreSQL."
+    )
+
+    email = "search-benchmark@example.com"
+    slug = "search-benchmark"
+    queries = ["결제", "배포 파이프라인", "캐시를", "api", "모"]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 50, 200],
+            help="experiences per profile (x 10 duties x 10 items x 5 subitems)",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, sizes: list[int], repeat: int, **options):
+        report = {}
+        try:
+            for size in sizes:
+                call_command(
+                    "seed_profile_tree",
+                    email=self.email,
+                    slug=self.slug,
+                    experiences=size,
+                    force=True,
+                    stdout=self.stderr,
+                )
+                report[size] = self.measure(
+                    Profile.objects.get(slug=self.slug).id, repeat
+                )
+        finally:
+            Profile.objects.filter(slug=self.slug).delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for size, stats in report.items():
+            self.stdout.write(
+                f"{size:>5} experiences: p50={stats['p50_ms']:.2f}ms "
+                f"p95={stats['p95_ms']:.2f}ms index={stats['index_used']}"
+            )
+
+    def measure(self, profile_id: int, repeat: int) -> dict:
+        timings = []
+        index_used = True
+        for text in self.queries:
+            queryset = Experience.objects.filter(
+                profile_id=profile_id, search_vector=search_query(text)
+            ).only("id", "company_name")
+            index_used &= "experience_search_idx" in queryset.explain()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+        return {
+            "queries": len(timings),
+            "p50_ms": percentile(timings, 50) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "index_used": index_used,
+        }
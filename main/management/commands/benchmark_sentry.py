@@ -0,0 +1,120 @@
+import json
+import statistics
+import time
+from collections import Counter
+from wsgiref.util import setup_testing_defaults
+
+import sentry_sdk
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from sentry_sdk.transport import Transport
+
+from getogrand_hypermedia.sentry_sampling import AdaptiveSampler
+from main.models import Experience
+
+from .benchmark_ttfb import percentile
+
+
+class CountingTransport(Transport):
+    """Counts envelope items by type instead of sending them."""
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.items = Counter()
+
+    def capture_envelope(self, envelope):
+        for item in envelope.items:
+            self.items[item.type] += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of Sentry tracing and profiling with Sentry "
+        "off, with the former fixed rates (traces 1.0, profiles 0.5) and with the "
+        "adaptive sampler, and count the transactions and profiles each would send. "
+        "Requests go through the WSGI handler that the Sentry integration wraps; the "
+        "origin response cache is disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, requests: int, **options):
+        experience = Experience.objects.filter(
+            profile__slug=settings.DEFAULT_PROFILE_SLUG
+        ).first()
+        routes = {"page": ("/", {}), "health": ("/health", {})}
+        if experience is not None:
+            routes["fragment"] = (
+                "/",
+                {
+                    "HTTP_HX_REQUEST": "true",
+                    "HTTP_HX_TARGET": f"experience-{experience.id}-details",
+                },
+            )
+
+        sampler = AdaptiveSampler(
+            healthy_per_second=settings.SENTRY_HEALTHY_TRACES_PER_SECOND,
+            profiles_per_second=settings.SENTRY_PROFILES_PER_SECOND,
+            slow_seconds=settings.SENTRY_SLOW_TRANSACTION_SECONDS,
+        )
+        modes = {
+            "off": {},
+            "fixed": {"traces_sample_rate": 1.0, "profiles_sample_rate": 0.5},
+            "adaptive": {
+                "traces_sampler": sampler.traces_sampler,
+                "profiles_sampler": sampler.profiles_sampler,
+                "before_send_transaction": sampler.before_send_transaction,
+            },
+        }
+
+        report = {}
+        for mode, sentry_options in modes.items():
+            transport = CountingTransport()
+            sentry_sdk.init(
+                dsn="https://public@sentry.invalid/1",
+                transport=transport,
+                **sentry_options,
+            )
+            with override_settings(RESPONSE_CACHE_ENABLED=False):
+                application = WSGIHandler()
+                report[mode] = {
+                    name: self.measure(application, path, environ, requests)
+                    for name, (path, environ) in routes.items()
+                }
+            sentry_sdk.flush(timeout=5)
+            report[mode]["sent"] = dict(transport.items)
+        sentry_sdk.init(dsn=None)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for mode in modes:
+            timings = " ".join(
+                f"{name} {report[mode][name]['mean_us']:.0f}us"
+                f"/{report[mode][name]['cpu_us']:.0f}us cpu"
+                for name in routes
+            )
+            self.stdout.write(f"{mode:>8}: {timings}, sent {report[mode]['sent']}")
+
+    def measure(
+        self, application: WSGIHandler, path: str, environ: dict, requests: int
+    ) -> dict:
+        timings, cpu = [], []
+        for _ in range(requests):
+            request_environ = {"PATH_INFO": path, **environ}
+            setup_testing_defaults(request_environ)
+            start, start_cpu = time.perf_counter(), time.process_time()
+            response = application(request_environ, lambda status, headers: None)
+            b"".join(response)
+            response.close()
+            timings.append(time.perf_counter() - start)
+            cpu.append(time.process_time() - start_cpu)
+        return {
+            "mean_us": statistics.fmean(timings) * 1e6,
+            "p95_us": percentile(timings, 95) * 1e6,
+            "cpu_us": statistics.fmean(cpu) * 1e6,
+        }
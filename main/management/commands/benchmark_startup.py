@@ -0,0 +1,144 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from getogrand_hypermedia.utils import get_self_ip
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_times(log: str) -> dict[str, float]:
+    """Seconds spent importing each top-level package, from `-X importtime` output.
+    Self times are summed, so a package's imports of other packages count for those."""
+    seconds: dict[str, float] = defaultdict(float)
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        seconds[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return dict(seconds)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure a cold start as the container does it: time from exec of gunicorn "
+        "to the first served /health, with import time broken down by package. "
+        "Fails when the median run exceeds the budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=settings.STARTUP_BUDGET_SECONDS,
+            help="seconds allowed from exec to the first served request",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--top", type=int, default=15, help="packages to list")
+        parser.add_argument(
+            "--cold-bytecode",
+            action="store_true",
+            help="ignore every existing .pyc, as an image built without them would",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, budget: float, repeat: int, top: int, **options):
+        runs = [self.start_once(options["cold_bytecode"]) for _ in range(repeat)]
+        runs.sort(key=lambda run: run["first_request_s"])
+        median = runs[len(runs) // 2]
+        # settings가 ALLOWED_HOSTS를 만들며 부르는 조회는 import 시간에 잡히지 않으므로 따로 잰다.
+        start = time.perf_counter()
+        get_self_ip()
+        self_ip_s = time.perf_counter() - start
+        report = {
+            "budget_s": budget,
+            "first_request_s": median["first_request_s"],
+            "runs_s": [run["first_request_s"] for run in runs],
+            "imports_s": sum(median["packages"].values()),
+            "self_ip_s": self_ip_s,
+            "packages_s": dict(
+                sorted(median["packages"].items(), key=lambda item: -item[1])[:top]
+            ),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"first request after {report['first_request_s']:.3f}s "
+                f"(median of {repeat}: "
+                + ", ".join(f"{s:.3f}" for s in report["runs_s"])
+                + f"), of which imports {report['imports_s']:.3f}s"
+            )
+            self.stdout.write(f"self IP lookup {report['self_ip_s'] * 1000:.1f}ms")
+            for package, seconds in report["packages_s"].items():
+                self.stdout.write(f"  {seconds * 1000:8.1f}ms  {package}")
+        if report["first_request_s"] > budget:
+            raise CommandError(
+                f"startup took {report['first_request_s']:.3f}s, budget {budget}s"
+            )
+
+    def start_once(self, cold_bytecode: bool) -> dict:
+        port = free_port()
+        env = {**os.environ, "PYTHONPROFILEIMPORTTIME": "1"}
+        pycache = tempfile.TemporaryDirectory()
+        if cold_bytecode:
+            env["PYTHONPYCACHEPREFIX"] = pycache.name
+        with pycache, tempfile.TemporaryFile(mode="w+") as log:
+            start = time.perf_counter()
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "--config",
+                    str(Path(settings.BASE_DIR) / "gunicorn.conf.py"),
+                    "--bind",
+                    f"127.0.0.1:{port}",
+                ],
+                cwd=settings.BASE_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+            )
+            try:
+                first_request = self.wait_for_first_request(server, port) - start
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            log.seek(0)
+            return {
+                "first_request_s": first_request,
+                "packages": import_times(log.read()),
+            }
+
+    def wait_for_first_request(self, server: subprocess.Popen, port: int) -> float:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup")
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            try:
+                connection.request("GET", "/health")
+                if connection.getresponse().status == 200:
+                    return time.perf_counter()
+            except OSError:
+                # 아직 listen하기 전이다.
+                time.sleep(0.01)
+            finally:
+                connection.close()
+        raise CommandError("gunicorn did not serve /health within 60s")
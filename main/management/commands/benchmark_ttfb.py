@@ -0,0 +1,84 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare time to first byte and total time of the index page between the "
+        "buffered and the streaming rendering mode. The origin response cache is "
+        "bypassed so every request renders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument(
+            "--db-latency-ms",
+            type=float,
+            default=0,
+            help="extra latency added to every query, to emulate a remote database",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, requests: int, db_latency_ms: float, **options):
+        middleware = [
+            m
+            for m in settings.MIDDLEWARE
+            if m != "main.middlewares.ResponseCacheMiddleware"
+        ]
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(db_latency_ms / 1000)
+            return execute(sql, params, many, context)
+
+        report = {}
+        with connection.execute_wrapper(delay):
+            for mode, streaming in [("buffered", False), ("streaming", True)]:
+                with override_settings(
+                    MIDDLEWARE=middleware, INDEX_STREAMING_ENABLED=streaming
+                ):
+                    report[mode] = self.measure(Client(), requests)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for mode, stats in report.items():
+            self.stdout.write(
+                f"{mode:>9}: ttfb p50={stats['ttfb_p50_ms']:.2f}ms "
+                f"p95={stats['ttfb_p95_ms']:.2f}ms "
+                f"total p50={stats['total_p50_ms']:.2f}ms"
+            )
+
+    def measure(self, client: Client, requests: int) -> dict:
+        ttfbs, totals = [], []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get("/", HTTP_ACCEPT_ENCODING="br")
+            if response.streaming:
+                chunks = iter(response.streaming_content)
+                next(chunks, None)
+                ttfbs.append(time.perf_counter() - start)
+                for _ in chunks:
+                    pass
+            else:
+                ttfbs.append(time.perf_counter() - start)
+            totals.append(time.perf_counter() - start)
+        return {
+            "requests": requests,
+            "ttfb_p50_ms": percentile(ttfbs, 50) * 1000,
+            "ttfb_p95_ms": percentile(ttfbs, 95) * 1000,
+            "total_p50_ms": percentile(totals, 50) * 1000,
+            "total_p95_ms": percentile(totals, 95) * 1000,
+        }
+
+
+def percentile(values: list[float], p: int) -> float:
+    # quantiles()는 표본이 둘 이상이어야 한다.
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
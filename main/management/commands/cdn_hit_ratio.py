@@ -0,0 +1,94 @@
+import gzip
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.core.management.base import BaseCommand, CommandError
+
+HIT_RESULT_TYPES = {"Hit", "RefreshHit"}
+MISS_RESULT_TYPES = {"Miss"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the CloudFront cache hit ratio from standard access logs "
+        "(e.g. synced with `aws s3 sync s3://<log-bucket> <dir>`). Use --split-at "
+        "to compare the periods before and after a deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("log_dir", type=Path)
+        parser.add_argument(
+            "--split-at",
+            type=utc_datetime,
+            help="datetime (ISO 8601, UTC unless it has an offset) that separates "
+            "'before' and 'after'",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, log_dir: Path, split_at: datetime | None, **options):
+        if not log_dir.is_dir():
+            raise CommandError(f"not a directory: {log_dir}")
+
+        periods: dict[str, dict] = defaultdict(
+            lambda: {"results": Counter(), "variants": defaultdict(set)}
+        )
+        for record in self.read_records(log_dir):
+            requested_at = utc_datetime(f"{record['date']}T{record['time']}")
+            period = (
+                "all"
+                if split_at is None
+                else ("before" if requested_at < split_at else "after")
+            )
+            result_type = record["x-edge-result-type"]
+            periods[period]["results"][result_type] += 1
+            if record["cs-method"] == "GET" and result_type in (
+                HIT_RESULT_TYPES | MISS_RESULT_TYPES
+            ):
+                periods[period]["variants"][record["cs-uri-stem"]].add(
+                    unquote(record["cs-uri-query"])
+                )
+
+        report = {period: self.summarize(**stats) for period, stats in periods.items()}
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for period, summary in report.items():
+            self.stdout.write(
+                f"[{period}] requests={summary['requests']} "
+                f"hit_ratio={summary['hit_ratio']:.2%} "
+                f"query_variants={summary['query_variants']}"
+            )
+
+    def summarize(self, results: Counter, variants: dict[str, set]) -> dict:
+        hits = sum(results[t] for t in HIT_RESULT_TYPES)
+        misses = sum(results[t] for t in MISS_RESULT_TYPES)
+        return {
+            "requests": sum(results.values()),
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "results": dict(results),
+            "query_variants": sum(len(queries) for queries in variants.values()),
+        }
+
+    def read_records(self, log_dir: Path):
+        for path in sorted(log_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rt") as file:
+                fields: list[str] = []
+                for line in file:
+                    if line.startswith("#Fields:"):
+                        fields = line.split()[1:]
+                    elif not line.startswith("#") and fields:
+                        yield dict(zip(fields, line.rstrip("\n").split("\t")))
+
+
+def utc_datetime(value: str) -> datetime:
+    """ISO 8601 as an aware datetime. CloudFront logs UTC without an offset."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
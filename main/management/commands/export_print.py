@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.print_export import print_exports
+from main.views import get_profile_tree
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the print export (PDF, or HTML without WeasyPrint) of a profile's "
+        "current content version to PRINT_EXPORT_ROOT and remove older versions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile-id", type=int)
+        parser.add_argument("--slug", default=settings.DEFAULT_PROFILE_SLUG)
+
+    def handle(self, *args, profile_id: int | None, slug: str, **options):
+        profile = (
+            get_profile_tree(pk=profile_id)
+            if profile_id is not None
+            else get_profile_tree(slug=slug)
+        )
+        path = print_exports.export(profile)
+        self.stdout.write(self.style.SUCCESS(f"exported {path}"))
@@ -0,0 +1,124 @@
+import json
+import shutil
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+from django.test import RequestFactory
+from whitenoise.compress import Compressor
+
+from main.forms import ProfileForm
+from main.views import get_profile_tree, render_index, render_experience_fragment
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the canonical index page and every experience_details fragment "
+        "to STATIC_EXPORT_ROOT, with precompressed variants. Only experiences "
+        "whose `modified` changed since the last run are re-rendered."
+    )
+
+    manifest_name = "manifest.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--slug",
+            default=settings.DEFAULT_PROFILE_SLUG,
+            help="profile to export; only the profile served at / can be exported",
+        )
+        parser.add_argument("--force", action="store_true", help="re-render every file")
+
+    def handle(self, *args, slug: str, force: bool, **options):
+        root = Path(settings.STATIC_EXPORT_ROOT)
+        root.mkdir(parents=True, exist_ok=True)
+        self.compressor = Compressor(log=self.stdout.write, quiet=True)
+
+        previous = {} if force else self.read_manifest(root)
+        profile = get_profile_tree(slug=slug)
+        experiences = list(profile.experience_set.all())
+
+        # 모든 fragment가 <select>의 option 목록을 포함하므로, 경력 목록이 바뀌면 전부 다시 렌더링한다.
+        choices = [
+            [experience.id, experience.company_name] for experience in experiences
+        ]
+        rerender_all = (
+            previous.get("profile") != profile.id or previous.get("choices") != choices
+        )
+
+        manifest = {
+            "profile": profile.id,
+            "choices": choices,
+            "experiences": {},
+        }
+
+        # 정적 파일의 해시가 배포마다 바뀔 수 있으므로 index는 항상 렌더링하고, 내용이 바뀐 경우에만 쓴다.
+        request = RequestFactory().get("/")
+        form = ProfileForm(profile=profile, data=None)
+        form.full_clean()
+        self.write(
+            root / "index.html",
+            render_index(request, profile, form),
+            only_if_changed=True,
+        )
+
+        rendered = 0
+        for experience in experiences:
+            key = str(experience.id)
+            modified = experience.modified.isoformat()
+            manifest["experiences"][key] = modified
+            if (
+                not rerender_all
+                and previous.get("experiences", {}).get(key) == modified
+            ):
+                continue
+
+            # 정적으로 서빙 가능한 상태는 초기 페이지에서 하나만 펼치거나 접는 경우뿐이다.
+            # 그 외 조합은 동적 앱이 처리한다.
+            for hx_target, expanded_ids in [
+                (f"experience-{experience.id}-expand", [experience.id]),
+                (f"experience-{experience.id}-details", []),
+            ]:
+                query = urlencode({"expanded_experience_ids": expanded_ids}, doseq=True)
+                form = ProfileForm(
+                    profile=profile, data=QueryDict(query) if query else None
+                )
+                form.full_clean()
+                self.write(
+                    root / "fragments" / hx_target / f"_{query}.html",
+                    render_experience_fragment(experience, form),
+                )
+            rendered += 1
+
+        for key in set(previous.get("experiences", {})) - set(manifest["experiences"]):
+            for suffix in ["expand", "details"]:
+                shutil.rmtree(
+                    root / "fragments" / f"experience-{key}-{suffix}",
+                    ignore_errors=True,
+                )
+
+        (root / self.manifest_name).write_text(json.dumps(manifest, indent=2))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"exported {rendered} of {len(experiences)} experiences to {root}"
+            )
+        )
+
+    def read_manifest(self, root: Path) -> dict:
+        try:
+            return json.loads((root / self.manifest_name).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def write(self, path: Path, content: str, only_if_changed: bool = False):
+        if only_if_changed and path.exists() and path.read_text() == content:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for stale in [
+            path.with_name(path.name + ".br"),
+            path.with_name(path.name + ".gz"),
+        ]:
+            stale.unlink(missing_ok=True)
+        path.write_text(content)
+        self.compressor.compress(str(path))
@@ -0,0 +1,315 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from main.models import Duty, DutyItem, DutySubitem, Profile
+
+from .benchmark_ttfb import percentile
+
+SENTRY_ENVELOPE = (
+    b'{"dsn":"https://0a1b9010ce08d2a62d63777fca3302cd@o303432.ingest.us.sentry.io'
+    b'/4507459219685376"}\n{"type":"event"}\n{"message":"loadtest"}\n'
+)
+
+
+@dataclass
+class Scenario:
+    method: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes | None = None
+    expected_statuses: tuple[int, ...] = (200,)
+
+
+class SentrySink(BaseHTTPRequestHandler):
+    """Stands in for the Sentry ingest endpoint so tunnel posts stay local."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run scripted request scenarios against the gunicorn gevent config and report "
+        "throughput, latency percentiles, queries per request and server RSS as JSON. "
+        "Seed a large tree first with `seed_profile_tree`."
+    )
+
+    scenario_names = [
+        "full_page",
+        "expand",
+        "collapse",
+        "boosted",
+        "conditional",
+        "sentry_tunnel",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=self.scenario_names,
+            help="run only these scenarios (repeatable)",
+        )
+        parser.add_argument("--slug", default=settings.DEFAULT_PROFILE_SLUG)
+        parser.add_argument("--requests", type=int, default=500, help="per scenario")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--no-response-cache",
+            action="store_true",
+            help="disable the origin response cache so every request renders",
+        )
+        parser.add_argument("--output", type=Path, help="write the report to a file")
+
+    def handle(self, *args, **options):
+        profile = Profile.objects.filter(slug=options["slug"]).first()
+        if profile is None:
+            raise CommandError(f"no profile {options['slug']}, seed one first")
+        experience_ids = sorted(profile.experience_set.values_list("id", flat=True))
+        if not experience_ids:
+            raise CommandError("the profile has no experiences")
+
+        sink = ThreadingHTTPServer(("127.0.0.1", 0), SentrySink)
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        sink_url = f"http://127.0.0.1:{sink.server_address[1]}"
+
+        scenarios = self.build_scenarios(profile, experience_ids)
+        selected = options["scenario"] or self.scenario_names
+
+        report = {
+            "shape": self.shape(profile),
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "response_cache": not options["no_response_cache"],
+            "scenarios": {},
+        }
+        with override_settings(
+            SENTRY_TUNNEL_UPSTREAM=sink_url, RESPONSE_CACHE_ENABLED=False
+        ):
+            queries = {name: self.count_queries(scenarios[name]) for name in selected}
+
+        server = self.start_server(options["port"], sink_url, options)
+        try:
+            for name in selected:
+                stats = self.run_scenario(
+                    scenarios[name],
+                    options["port"],
+                    options["requests"],
+                    options["concurrency"],
+                    server.pid,
+                )
+                stats["queries_per_request"] = queries[name]
+                report["scenarios"][name] = stats
+                self.stderr.write(
+                    f"{name:>13}: {stats['throughput_rps']:.1f} req/s "
+                    f"p50={stats['latency_p50_ms']:.1f}ms "
+                    f"p99={stats['latency_p99_ms']:.1f}ms "
+                    f"errors={stats['errors']}"
+                )
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+            sink.shutdown()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            options["output"].write_text(output)
+        else:
+            self.stdout.write(output)
+
+    def shape(self, profile: Profile) -> dict:
+        return {
+            "experiences": profile.experience_set.count(),
+            "duties": Duty.objects.filter(experience__profile=profile).count(),
+            "items": DutyItem.objects.filter(duty__experience__profile=profile).count(),
+            "subitems": DutySubitem.objects.filter(
+                duty_item__duty__experience__profile=profile
+            ).count(),
+        }
+
+    def build_scenarios(self, profile: Profile, experience_ids: list[int]) -> dict:
+        first = experience_ids[0]
+        path = (
+            "/"
+            if profile.slug == settings.DEFAULT_PROFILE_SLUG
+            else f"/p/{profile.slug}/"
+        )
+        last_modified = formatdate(profile.modified.timestamp(), usegmt=True)
+        hx = {"HX-Request": "true", "HX-Current-URL": "http://localhost/"}
+        return {
+            "full_page": Scenario("GET", path),
+            "expand": Scenario(
+                "GET",
+                f"{path}?expanded_experience_ids={first}",
+                {**hx, "HX-Target": f"experience-{first}-expand"},
+            ),
+            "collapse": Scenario(
+                "GET", path, {**hx, "HX-Target": f"experience-{first}-details"}
+            ),
+            "boosted": Scenario("GET", path, {**hx, "HX-Boosted": "true"}),
+            "conditional": Scenario(
+                "GET",
+                path,
+                {"If-Modified-Since": last_modified},
+                expected_statuses=(304,),
+            ),
+            "sentry_tunnel": Scenario(
+                "POST",
+                "/sentry_tunnel",
+                {"Content-Type": "application/x-sentry-envelope"},
+                SENTRY_ENVELOPE,
+                # 같은 클라이언트가 같은 에러를 계속 보내므로 대부분 rate limit이나 중복 제거로 끝난다.
+                expected_statuses=(200, 429),
+            ),
+        }
+
+    def count_queries(self, scenario: Scenario) -> int:
+        client = Client()
+        headers = {k.lower(): v for k, v in scenario.headers.items()}
+        with CaptureQueriesContext(connection) as context:
+            response = client.generic(
+                scenario.method, scenario.path, scenario.body or b"", headers=headers
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return len(context.captured_queries)
+
+    def start_server(self, port: int, sink_url: str, options) -> subprocess.Popen:
+        env = {
+            **os.environ,
+            "SENTRY_TUNNEL_UPSTREAM": sink_url,
+            "RESPONSE_CACHE": str(not options["no_response_cache"]),
+        }
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "--config",
+                str(settings.BASE_DIR / "gunicorn.conf.py"),
+                "--bind",
+                f"127.0.0.1:{port}",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            # access log도 실제처럼 stdout의 로그 파이프라인을 거치게 한다.
+            stdout=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    return server
+            except OSError:
+                time.sleep(0.2)
+        server.kill()
+        raise CommandError("gunicorn did not start listening in time")
+
+    def run_scenario(
+        self, scenario: Scenario, port: int, requests: int, concurrency: int, pid: int
+    ) -> dict:
+        latencies: list[float] = []
+        errors = 0
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal errors
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                start = time.perf_counter()
+                try:
+                    conn.request(
+                        scenario.method,
+                        scenario.path,
+                        body=scenario.body,
+                        headers={"Accept-Encoding": "br", **scenario.headers},
+                    )
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status in scenario.expected_statuses
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    errors += not ok
+            conn.close()
+
+        rss_samples: list[int] = []
+        done = threading.Event()
+
+        def sample_rss():
+            while not done.wait(0.1):
+                rss_samples.append(process_tree_rss(pid))
+
+        sampler = threading.Thread(target=sample_rss)
+        sampler.start()
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        done.set()
+        sampler.join()
+        rss_samples.append(process_tree_rss(pid))
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / wall,
+            "latency_p50_ms": percentile(latencies, 50) * 1000,
+            "latency_p95_ms": percentile(latencies, 95) * 1000,
+            "latency_p99_ms": percentile(latencies, 99) * 1000,
+            "rss_peak_bytes": max(rss_samples),
+        }
+
+
+def process_tree_rss(pid: int) -> int:
+    """Resident set size of `pid` and its children (the gunicorn workers), from /proc."""
+    total = 0
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except OSError:
+        return 0
+    for process in [pid, *map(int, children)]:
+        try:
+            status = Path(f"/proc/{process}/status").read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1]) * 1024
+    return total
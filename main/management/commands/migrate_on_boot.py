@@ -0,0 +1,125 @@
+import hashlib
+import importlib.util
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+
+# 모든 레플리카가 같은 값을 써야 하는 pg_advisory_lock 키
+LOCK_ID = 0x6765746F_6D696772
+FINGERPRINT_TABLE = "migration_fingerprint"
+
+
+def migration_files() -> list[Path]:
+    """Migration modules of every installed app, found on disk without importing them."""
+    files = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except ModuleNotFoundError:
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for location in spec.submodule_search_locations:
+            files.extend(sorted(Path(location).glob("*.py")))
+    return files
+
+
+def fingerprint() -> str:
+    digest = hashlib.sha256()
+    for path in migration_files():
+        digest.update(f"{path.parent.name}/{path.name}\0".encode())
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot-time migrate: skip the migration machinery when the migration files "
+        "hash to the value recorded by the last run, otherwise migrate under a "
+        "Postgres advisory lock so only one replica applies them while the others wait."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wait-timeout",
+            type=float,
+            default=600,
+            help="seconds to wait for another replica's migrate before giving up",
+        )
+
+    def handle(self, *args, wait_timeout: float, **options):
+        start = time.perf_counter()
+        expected = fingerprint()
+        if self.recorded() == expected:
+            self.stdout.write(
+                f"migrations unchanged ({expected[:12]}), skipped in "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+            return
+
+        with self.lock(wait_timeout):
+            # 기다리는 동안 다른 레플리카가 이미 적용했을 수 있다.
+            if self.recorded() == expected:
+                self.stdout.write(
+                    f"migrations applied by another replica ({expected[:12]})"
+                )
+                return
+            call_command("migrate", interactive=False, verbosity=options["verbosity"])
+            self.record(expected)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"migrated ({expected[:12]}) in {time.perf_counter() - start:.1f}s"
+            )
+        )
+
+    def recorded(self) -> str | None:
+        if FINGERPRINT_TABLE not in connection.introspection.table_names():
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT fingerprint FROM {FINGERPRINT_TABLE} WHERE id = 1")
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def record(self, value: str):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} "
+                "(id integer PRIMARY KEY, fingerprint varchar(64) NOT NULL)"
+            )
+            cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FINGERPRINT_TABLE} (id, fingerprint) VALUES (1, %s)",
+                [value],
+            )
+
+    @contextmanager
+    def lock(self, wait_timeout: float):
+        if connection.vendor != "postgresql":
+            yield
+            return
+        deadline = time.monotonic() + wait_timeout
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [LOCK_ID])
+            while not cursor.fetchone()[0]:
+                if time.monotonic() > deadline:
+                    raise CommandError(
+                        f"another replica held the migrate lock for {wait_timeout}s"
+                    )
+                self.stdout.write("waiting for another replica to migrate")
+                time.sleep(1)
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [LOCK_ID])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [LOCK_ID])
@@ -0,0 +1,41 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs outside the web workers, e.g. with JOBS_WEB_WORKERS=0. "
+        "Any number of these can run next to each other and the web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=settings.JOBS_BATCH_SIZE)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="run the jobs that are due and exit, e.g. from cron",
+        )
+
+    def handle(self, *args, threads: int, batch_size: int, once: bool, **options):
+        worker = Worker(
+            batch_size=batch_size, poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS
+        )
+        if once:
+            total = 0
+            while claimed := worker.run_once():
+                total += claimed
+            self.stdout.write(self.style.SUCCESS(f"ran {total} jobs"))
+            return
+
+        signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+        self.stdout.write(f"running jobs on {threads} threads")
+        worker.start(threads - 1)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
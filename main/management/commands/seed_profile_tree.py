@@ -0,0 +1,97 @@
+import datetime
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from main.models import Duty, DutyItem, DutySubitem, Experience, Profile
+from main.search import update_search_vectors
+
+WORDS = (
+    "서비스 플랫폼 결제 검색 추천 배포 파이프라인 모니터링 캐시 데이터베이스 "
+    "마이그레이션 리팩터링 성능 개선 설계 운영 자동화 테스트 인프라 API 백엔드"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic Profile tree of the given shape for load testing. An existing "
+        "tree of the same email is replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default="getogrand@hey.com")
+        parser.add_argument("--slug", help="defaults to the local part of the email")
+        parser.add_argument("--experiences", type=int, default=50)
+        parser.add_argument("--duties", type=int, default=10, help="per experience")
+        parser.add_argument("--items", type=int, default=10, help="per duty")
+        parser.add_argument("--subitems", type=int, default=5, help="per item")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="allow replacing data when DEBUG is off",
+        )
+
+    def handle(
+        self, *args, email: str, slug: str | None, seed: int, force: bool, **shape
+    ):
+        if not settings.DEBUG and not force:
+            raise CommandError(
+                "refusing to replace profile data with DEBUG off, use --force"
+            )
+        rng = random.Random(seed)
+
+        def sentence(words: int) -> str:
+            return " ".join(rng.choice(WORDS) for _ in range(words))
+
+        with transaction.atomic():
+            Profile.objects.filter(email=email).delete()
+            profile = Profile.objects.create(
+                full_name=sentence(2),
+                email=email,
+                slug=slug or slugify(email.split("@")[0]),
+            )
+
+            start = datetime.date(2000, 1, 1)
+            experiences = Experience.objects.bulk_create(
+                Experience(
+                    profile=profile,
+                    story=sentence(40),
+                    company_name=sentence(2),
+                    positions=[sentence(2)],
+                    start=start + datetime.timedelta(days=180 * i),
+                    end=start + datetime.timedelta(days=180 * (i + 1)),
+                )
+                for i in range(shape["experiences"])
+            )
+            duties = Duty.objects.bulk_create(
+                Duty(
+                    experience=experience,
+                    title=sentence(5),
+                    start=experience.start,
+                    end=experience.end,
+                )
+                for experience in experiences
+                for _ in range(shape["duties"])
+            )
+            items = DutyItem.objects.bulk_create(
+                DutyItem(duty=duty, title=sentence(12))
+                for duty in duties
+                for _ in range(shape["items"])
+            )
+            subitems = DutySubitem.objects.bulk_create(
+                DutySubitem(duty_item=item, title=sentence(8))
+                for item in items
+                for _ in range(shape["subitems"])
+            )
+            # bulk_create는 save()를 거치지 않으므로 캐시 무효화를 위해 프로필을 한 번 저장하고, 직접 색인한다.
+            profile.save()
+            update_search_vectors(experience.id for experience in experiences)
+
+        self.stdout.write(
+            f"seeded {email}: {len(experiences)} experiences, {len(duties)} duties, "
+            f"{len(items)} items, {len(subitems)} subitems"
+        )
@@ -0,0 +1,50 @@
+import json
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand
+
+from main.storage import image_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the bytes saved by the collectstatic image pipeline: each image's "
+        "source size, its optimised size in STATIC_ROOT and its AVIF/WebP variants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        results = image_report()
+        original = sum(result.original for result in results)
+        optimized = sum(result.optimized for result in results)
+        smallest = sum(result.smallest for result in results)
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "original": original,
+                        "optimized": optimized,
+                        "smallest": smallest,
+                        "images": [asdict(result) for result in results],
+                    },
+                    indent=2,
+                )
+            )
+            return
+
+        for result in results:
+            variants = " ".join(
+                f"{format} {size}" for format, size in result.variants.items()
+            )
+            self.stdout.write(
+                f"{result.original:>8} -> {result.optimized:>8}  "
+                f"{variants:<24} {result.name}"
+            )
+        self.stdout.write(
+            f"{len(results)} images: {original} bytes, {optimized} optimised "
+            f"({original - optimized} saved), {smallest} with the smallest variant "
+            f"({original - smallest} saved)"
+        )
@@ -0,0 +1,89 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, Labels, float]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric"):
+        with self.lock:
+            self.metrics[metric.name] = metric
+
+    def exposition(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.collect():
+                label_text = ",".join(f'{k}="{escape(v)}"' for k, v in labels)
+                lines.append(
+                    f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registry = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        registry.register(self)
+
+    def collect(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self.lock = threading.Lock()
+        self.values: dict[Labels, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] += amount
+
+    def collect(self) -> Iterable[Sample]:
+        with self.lock:
+            return [(self.name, labels, value) for labels, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """Reads its value from `function` at collection time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def collect(self) -> Iterable[Sample]:
+        return [(self.name, (), self.function())]
+
+
+@staff_member_required
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse(
+        registry.exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
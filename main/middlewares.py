@@ -1,6 +1,34 @@
+import copy
+import threading
+import time
+from gzip import GzipFile
+from typing import Callable
+
+import brotli
+import zstandard
+
 from asgiref.sync import iscoroutinefunction, markcoroutinefunction
-from django.http import HttpResponse, HttpRequest
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import HttpResponse, HttpRequest, StreamingHttpResponse
+from compression_middleware.middleware import (
+    CompressionMiddleware,
+    compressor as select_compressor,
+)
 from django.utils import translation
+from django.utils.cache import (
+    cc_delim_re,
+    has_vary_header,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.module_loading import import_string
+from django.utils.text import StreamingBuffer
+
+from .profiler import ProfilerUnavailable, is_profile_token, profiler
+from .response_cache import cache_key, response_cache
+from .template_timing import request_timings, server_timing_header
 
 
 class HealthCheckMiddleware:
@@ -30,7 +58,7 @@ class HealthCheckMiddleware:
 
 class DisableAdminI18nMiddleware:
     async_capable = True
-    sync_capable = False
+    sync_capable = True
 
     def __init__(self, get_response) -> None:
         self.get_response = get_response
@@ -51,3 +79,327 @@ class DisableAdminI18nMiddleware:
             translation.activate("en")
 
         return await self.get_response(request)
+
+
+class ResponseCacheMiddleware:
+    """Origin-side cache for responses the view marks as shared-cacheable (`s-maxage`
+    or `public`). Stale entries are served while a single background render refreshes
+    them, concurrent misses for the same key share one render, and a stale entry keeps
+    being served while regeneration fails. Requests whose query is not canonical
+    bypass it, so the view redirects them."""
+
+    async_capable = False
+    sync_capable = True
+
+    conditional_headers = ["HTTP_IF_MODIFIED_SINCE", "HTTP_IF_NONE_MATCH"]
+
+    def __init__(self, get_response) -> None:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        key = cache_key(request)
+        if request.method not in ("GET", "HEAD") or key is None:
+            return self.get_response(request)
+
+        # 조건부 요청에 대한 304가 캐시되지 않도록, 조건부 헤더는 바깥의 ConditionalGetMiddleware만 본다.
+        inner_request = copy.copy(request)
+        inner_request.META = {
+            k: v for k, v in request.META.items() if k not in self.conditional_headers
+        }
+
+        entry = response_cache.get(key)
+        if entry is not None:
+            if not response_cache.is_fresh(entry):
+                response_cache.regenerate_in_background(
+                    key, inner_request, self.get_response, self.is_cacheable
+                )
+            return entry.response
+
+        response = response_cache.regenerate(
+            key, inner_request, self.get_response, self.is_cacheable
+        )
+        if response is None:
+            entry = response_cache.get(key)
+            response = entry.response if entry else self.get_response(inner_request)
+        return response
+
+    def is_cacheable(self, response: HttpResponse) -> bool:
+        cache_control = {
+            directive.split("=")[0].strip().lower()
+            for directive in cc_delim_re.split(response.get("Cache-Control", ""))
+        }
+        return (
+            response.status_code == 200
+            and not response.cookies
+            and not has_vary_header(response, "Cookie")
+            and bool(cache_control & {"s-maxage", "public"})
+            and not cache_control & {"private", "no-store", "no-cache"}
+        )
+
+
+class ServerTimingMiddleware:
+    """Reports the template render timings of the current request in a
+    `Server-Timing` header. A streamed page renders after its headers are sent, so its
+    timings follow the page instead, as `<script type="text/plain" id="server-timing">`.
+    Sits between the compression and the response cache, so that element is compressed
+    but not cached. Only used when TEMPLATE_TIMING_ENABLED is set."""
+
+    async_capable = False
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not settings.TEMPLATE_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        timings = {}
+        token = request_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, response, timings
+            )
+        elif timings:
+            response["Server-Timing"] = server_timing_header(timings)
+        return response
+
+    def stream(self, content, response: StreamingHttpResponse, timings: dict):
+        token = request_timings.set(timings)
+        try:
+            yield from content
+        finally:
+            request_timings.reset(token)
+        if timings and response.get("Content-Type", "").startswith("text/html"):
+            yield (
+                '<script type="text/plain" id="server-timing">'
+                + server_timing_header(timings).replace("</", "<\\/")
+                + "</script>"
+            ).encode()
+
+
+class ProfilerMiddleware:
+    """
+    Records a sampling profile of a request that carries a signed `X-Profile` token,
+    issued on /admin/profiler, until its response has been sent. The profile id is
+    returned in `X-Profile-Id`. Requests without the header are passed through.
+    """
+
+    async_capable = False
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        token = request.headers.get("X-Profile")
+        if token is None or not is_profile_token(token):
+            return self.get_response(request)
+
+        try:
+            profile = profiler.start_request(
+                f"{request.method} {request.get_full_path()}"
+            )
+        except ProfilerUnavailable:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            profiler.stop_request(profile)
+            raise
+        response["X-Profile-Id"] = str(profile.id)
+        # 프로파일된 응답은 CDN이 다른 요청에 내주지 않게 한다.
+        patch_cache_control(response, private=True)
+        if not response.streaming:
+            profiler.stop_request(profile)
+            return response
+
+        content = response.streaming_content
+
+        def iterate():
+            try:
+                yield from content
+            finally:
+                profiler.stop_request(profile)
+
+        response.streaming_content = iterate()
+        return response
+
+
+def gzip_compress_stream(sequence):
+    buf = StreamingBuffer()
+    with GzipFile(mode="wb", compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        yield buf.read()
+        for item in sequence:
+            zfile.write(item)
+            zfile.flush()
+            yield buf.read()
+    yield buf.read()
+
+
+def brotli_compress_stream(sequence):
+    compressor = brotli.Compressor(quality=4)
+    for item in sequence:
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+def zstd_compress_stream(sequence):
+    compressor = zstandard.ZstdCompressor(level=7).compressobj()
+    for item in sequence:
+        yield compressor.compress(item) + compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+    yield compressor.flush()
+
+
+class StreamingCompressionMiddleware(CompressionMiddleware):
+    """
+    CompressionMiddleware that flushes the compressor after every streamed chunk, so
+    a chunk sent early by a StreamingHttpResponse reaches the client early instead of
+    waiting in the compressor's buffer.
+    """
+
+    stream_compressors = {
+        "gzip": gzip_compress_stream,
+        "br": brotli_compress_stream,
+        "zstd": zstd_compress_stream,
+    }
+
+    def process_response(self, request, response):
+        if not response.streaming or response.has_header("Content-Encoding"):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding, _, _ = select_compressor(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if not encoding:
+            return response
+
+        response.streaming_content = self.stream_compressors[encoding](
+            response.streaming_content
+        )
+        del response["Content-Length"]
+        response["Content-Encoding"] = encoding
+        return response
+
+
+def is_prefetch(request: HttpRequest) -> bool:
+    # 브라우저는 Sec-Purpose를, fetch()로 미리 불러오는 클라이언트 코드는 Purpose를 보낸다.
+    purpose = request.headers.get("Sec-Purpose") or request.headers.get("Purpose", "")
+    return purpose.split(";")[0].strip() == "prefetch"
+
+
+class SpeculativePrefetchMiddleware:
+    """
+    Serves speculative prefetches (`Sec-Purpose: prefetch` or `Purpose: prefetch`) at
+    low priority: from the response cache when possible, otherwise only while fewer
+    than `PREFETCH_MAX_IN_FLIGHT` requests are in flight in the process. Under load
+    they are shed first, with an uncacheable 503, so they never take a worker away
+    from a real request.
+    """
+
+    async_capable = False
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    def __call__(self, request: HttpRequest):
+        with self.lock:
+            self.in_flight += 1
+            in_flight = self.in_flight
+        try:
+            if not is_prefetch(request):
+                return self.get_response(request)
+            key = cache_key(request)
+            if key is None or response_cache.get(key) is None:
+                if in_flight > settings.PREFETCH_MAX_IN_FLIGHT:
+                    return self.shed()
+                # 대기 중인 다른 요청에 먼저 양보한다.
+                time.sleep(0)
+            return self.get_response(request)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def shed(self) -> HttpResponse:
+        response = HttpResponse(status=503)
+        response["Cache-Control"] = "no-store"
+        response["Retry-After"] = "1"
+        return response
+
+
+class ScopedMiddleware:
+    """
+    Runs the middleware listed in `settings.SCOPED_MIDDLEWARE` for a path prefix only
+    on requests under that prefix, in place of this entry of `MIDDLEWARE`. Public
+    routes then skip session, auth, CSRF and messages work, and cannot pick up
+    `Vary: Cookie`. Their `process_view`, `process_exception` and
+    `process_template_response` hooks are called for scoped requests as well.
+    """
+
+    async_capable = False
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.scopes: list[tuple[str, Callable, list]] = []
+        for prefix, middleware_paths in settings.SCOPED_MIDDLEWARE.items():
+            handler = get_response
+            instances = []
+            for middleware_path in reversed(middleware_paths):
+                try:
+                    instance = import_string(middleware_path)(handler)
+                except MiddlewareNotUsed:
+                    continue
+                instances.insert(0, instance)
+                handler = convert_exception_to_response(instance)
+            self.scopes.append((prefix, handler, instances))
+
+    def scope_of(self, request: HttpRequest) -> tuple[str, Callable, list] | None:
+        for scope in self.scopes:
+            if request.path_info.startswith(scope[0]):
+                return scope
+        return None
+
+    def __call__(self, request: HttpRequest):
+        if (scope := self.scope_of(request)) is None:
+            return self.get_response(request)
+        return scope[1](request)
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs):
+        if (scope := self.scope_of(request)) is None:
+            return None
+        for instance in scope[2]:
+            if hasattr(instance, "process_view"):
+                response = instance.process_view(
+                    request, view_func, view_args, view_kwargs
+                )
+                if response is not None:
+                    return response
+        return None
+
+    def process_exception(self, request: HttpRequest, exception: Exception):
+        if (scope := self.scope_of(request)) is None:
+            return None
+        for instance in reversed(scope[2]):
+            if hasattr(instance, "process_exception"):
+                response = instance.process_exception(request, exception)
+                if response is not None:
+                    return response
+        return None
+
+    def process_template_response(self, request: HttpRequest, response):
+        if (scope := self.scope_of(request)) is None:
+            return response
+        for instance in reversed(scope[2]):
+            if hasattr(instance, "process_template_response"):
+                response = instance.process_template_response(request, response)
+        return response
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_slugs(apps, schema_editor):
+    Profile = apps.get_model('main', 'Profile')
+    for profile in Profile.objects.all():
+        profile.slug = slugify(profile.email.split('@')[0]) or str(profile.pk)
+        profile.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_alter_profile_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='slug',
+            field=models.SlugField(null=True),
+        ),
+        migrations.RunPython(populate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='profile',
+            name='slug',
+            field=models.SlugField(help_text='served at /p/<slug>/', unique=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='host',
+            field=models.CharField(blank=True, help_text='hostname that serves this profile at /, e.g. jane.getogrand.media', null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
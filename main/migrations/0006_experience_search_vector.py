@@ -0,0 +1,66 @@
+# Generated by Django 5.0.14 on 2026-10-19 13:17
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations
+
+
+# main.search의 당시 구현을 고정한 사본. 이후 main.search가 바뀌어도 이 migration의 결과는 바뀌지 않는다.
+word_re = re.compile(r"\w+")
+
+
+def ngrams(text):
+    grams = []
+    for word in word_re.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(word) <= 2:
+            grams.append(word)
+        else:
+            grams.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def document(experience):
+    texts = [experience.company_name, experience.story, *experience.positions]
+    for duty in experience.duty_set.all():
+        texts.append(duty.title)
+        for item in duty.dutyitem_set.all():
+            texts.append(item.title)
+            texts.extend(subitem.title for subitem in item.dutysubitem_set.all())
+    return " ".join(dict.fromkeys(gram for text in texts for gram in ngrams(text)))
+
+
+def populate_search_vectors(apps, schema_editor):
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import Value
+
+    Experience = apps.get_model('main', 'Experience')
+    experiences = Experience.objects.prefetch_related('duty_set__dutyitem_set__dutysubitem_set')
+    for experience in experiences:
+        Experience.objects.filter(pk=experience.pk).update(
+            search_vector=SearchVector(Value(document(experience)), config='simple')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_profile_slug_host_content_version'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        migrations.AddField(
+            model_name='experience',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['profile', 'search_vector'], name='experience_search_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-19 14:20
+
+import main.models
+from django.db import migrations, models
+
+
+# index.html에 고정되어 있던 내용을 원래 주인의 프로필로 옮긴다.
+BIO = '2013년부터 소프트웨어 개발자로 일하며 살고 있습니다. 단순 수다, 업계 이야기, 기술에 대한 문의/논의 및 이를 위한 커피챗 요청 환영합니다.'
+LINKS = [
+    {'name': 'Twitter(𝕏)', 'url': 'https://x.com/getogrand'},
+    {'name': 'GitHub', 'url': 'https://github.com/getogrand'},
+    {'name': 'Instagram', 'url': 'https://www.instagram.com/getogrand_'},
+    {'name': 'LinkedIn', 'url': 'https://www.linkedin.com/in/wonyoung-ju'},
+    {'name': 'StackOverflow', 'url': 'https://stackoverflow.com/users/12509847/getogrand'},
+    {'name': '적독가(積讀家)', 'url': 'https://xn--o39a90m89r.com/@getogrand'},
+]
+CLOSING = '다음 커리어는 다시 Full-Stack 웹 개발자 혹은 백엔드 개발자로 생각하고 있습니다. HTML-over-the-wire 류의 기술과 Full-Stack 프레임워크를 함께 써서 제가 생각한 합리적인 기술 스택을 직접 검증해 보고 싶습니다. 기술적 검증에 성공하고 비즈니스도 잘 되어 과연 이 스택으로 어디까지 스케일업이 가능한지 확인할 수 있다면 더할 나위 없이 좋겠습니다.'
+
+
+def populate_getogrand(apps, schema_editor):
+    Profile = apps.get_model('main', 'Profile')
+    Profile.objects.filter(slug='getogrand').update(bio=BIO, links=LINKS, closing=CLOSING)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='bio',
+            field=models.TextField(blank=True, help_text='introduction after the greeting'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='closing',
+            field=models.TextField(blank=True, help_text='paragraph after the career'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='links',
+            field=models.JSONField(blank=True, default=list, help_text='accounts, e.g. [{"name": "GitHub", "url": "https://github.com/jane"}]', validators=[main.models.validate_links]),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='host',
+            field=models.CharField(blank=True, help_text='hostname that serves this profile at /, e.g. jane.getogrand.media; must be allowed by ALLOWED_HOSTS', null=True, unique=True, validators=[main.models.validate_allowed_host]),
+        ),
+        migrations.RunPython(populate_getogrand, migrations.RunPython.noop),
+    ]
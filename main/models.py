@@ -1,10 +1,106 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
 from django.db import models
+from django.http.request import validate_host
+from django.utils import timezone
+from model_utils import FieldTracker
 from model_utils.models import TimeStampedModel
 
 
+pending_touches: ContextVar[dict | None] = ContextVar("pending_touches", default=None)
+
+
+def touch(parent: models.Model):
+    """Saves `parent` so its `modified` follows its children, or defers the save to the
+    end of the enclosing `batched_touches()` block."""
+    pending = pending_touches.get()
+    if pending is None:
+        parent.save()
+    else:
+        pending.setdefault((type(parent), parent.pk), parent)
+
+
+@contextmanager
+def batched_touches():
+    """
+    Within the block each parent touched by a child save is saved once at the end,
+    instead of once per child, along with its own parents. Saving 100 duty items of
+    one duty then costs one duty, experience and profile save instead of 100 each.
+    """
+    if pending_touches.get() is not None:
+        yield
+        return
+    pending: dict = {}
+    token = pending_touches.set(pending)
+    try:
+        yield
+        saved = set()
+        while pending:
+            key = next(iter(pending))
+            parent = pending.pop(key)
+            if key not in saved:
+                saved.add(key)
+                parent.save()
+    finally:
+        pending_touches.reset(token)
+
+
+def validate_allowed_host(host: str):
+    # ALLOWED_HOSTS에 없는 호스트는 ProfileRouter에 닿기 전에 400으로 거절된다.
+    if not validate_host(host, settings.ALLOWED_HOSTS):
+        raise ValidationError(f"{host} is not in ALLOWED_HOSTS")
+
+
+def validate_links(links):
+    if not isinstance(links, list) or not all(
+        isinstance(link, dict) and link.keys() == {"name", "url"} for link in links
+    ):
+        raise ValidationError('expected [{"name": ..., "url": ...}, ...]')
+    for link in links:
+        URLValidator(schemes=["http", "https"])(link["url"])
+
+
 class Profile(TimeStampedModel):
     full_name = models.CharField()
     email = models.EmailField(unique=True)
+    slug = models.SlugField(unique=True, help_text="served at /p/<slug>/")
+    host = models.CharField(
+        unique=True,
+        null=True,
+        blank=True,
+        validators=[validate_allowed_host],
+        help_text="hostname that serves this profile at /, e.g. jane.getogrand.media; "
+        "must be allowed by ALLOWED_HOSTS",
+    )
+    bio = models.TextField(blank=True, help_text="introduction after the greeting")
+    links: models.JSONField[list[dict[str, str]]] = models.JSONField(
+        default=list,
+        blank=True,
+        validators=[validate_links],
+        help_text='accounts, e.g. [{"name": "GitHub", "url": "https://github.com/jane"}]',
+    )
+    closing = models.TextField(blank=True, help_text="paragraph after the career")
+    content_version = models.PositiveIntegerField(default=1, editable=False)
+
+    tracker = FieldTracker(
+        fields=["full_name", "email", "slug", "host", "bio", "links", "closing"]
+    )
+
+    def save(self, *args, **kwargs):
+        # content_version은 signals에서 DB 값을 직접 올리므로, 메모리에 있는 오래된 값으로 덮어쓰지 않는다.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "content_version"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.full_name} ({self.email})"
@@ -25,10 +121,20 @@ class Experience(TimeStampedModel, DateFramedModel):
     positions: models.JSONField[list[str]] = models.JSONField(
         help_text="array of string"
     )
+    # main.search가 경력과 하위 업무 전체의 bigram으로 유지한다.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    tracker = FieldTracker(fields=["company_name"])
+
+    class Meta:
+        indexes = [
+            # 프로필 안에서만 찾으므로 profile_id를 함께 넣어(btree_gin) 전체 프로필 수와 무관하게 유지한다.
+            GinIndex(fields=["profile", "search_vector"], name="experience_search_idx")
+        ]
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.profile.save()
+        touch(self.profile)
 
     def __str__(self) -> str:
         return self.company_name
@@ -40,7 +146,7 @@ class Duty(TimeStampedModel, DateFramedModel):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.experience.save()
+        touch(self.experience)
 
     def __str__(self) -> str:
         return self.title
@@ -52,7 +158,7 @@ class DutyItem(TimeStampedModel):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.duty.save()
+        touch(self.duty)
 
     def __str__(self) -> str:
         return self.title
@@ -64,7 +170,53 @@ class DutySubitem(TimeStampedModel):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.duty_item.save()
+        touch(self.duty_item)
 
     def __str__(self) -> str:
         return self.title
+
+
+class Job(TimeStampedModel):
+    """A background job of `main.jobs`, deleted once it succeeds."""
+
+    class State(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        FAILED = "failed"
+
+    task = models.CharField()
+    args = models.JSONField(default=dict)
+    dedup_key = models.CharField(
+        null=True, blank=True, help_text="at most one queued job per key"
+    )
+    state = models.CharField(choices=State.choices, default=State.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # 워커가 폴링하는 대기 작업과 lease가 만료된 실행 중 작업만 담는다.
+            models.Index(
+                fields=["run_at"],
+                condition=models.Q(state="queued"),
+                name="job_queued_idx",
+            ),
+            models.Index(
+                fields=["locked_until"],
+                condition=models.Q(state="running"),
+                name="job_running_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(state="queued"),
+                name="job_queued_dedup_key_uniq",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task} #{self.pk} ({self.state})"
@@ -0,0 +1,162 @@
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import loader
+
+from .forms import ProfileForm
+from .jobs import task
+from .models import Profile
+from .storage import manifest_version
+
+name_re = re.compile(
+    r"profile-(?P<id>\d+)-v(?P<version>\d+)-(?P<static>[0-9a-f]+)\.(?P<format>pdf|html)"
+)
+
+
+def export_format() -> str:
+    """PDF when WeasyPrint is installed, otherwise an HTML page laid out for printing."""
+    return "pdf" if importlib.util.find_spec("weasyprint") else "html"
+
+
+def export_name(profile_id: int, version: int, format: str) -> str:
+    # 해시가 붙은 정적 파일을 가리키므로, 그 파일들을 가진 배포의 manifest 해시를 붙인다.
+    return f"profile-{profile_id}-v{version}-{manifest_version()}.{format}"
+
+
+def is_servable(match: re.Match) -> bool:
+    """PDFs embed their stylesheets and fonts. HTML exports link hashed static files,
+    which only the deploy that rendered them has."""
+    return match["format"] == "pdf" or match["static"] == manifest_version()
+
+
+def render_print(profile: Profile) -> str:
+    """The whole tree with every experience expanded, from the index page's partials."""
+    experience_ids = [experience.id for experience in profile.experience_set.all()]
+    form = ProfileForm(
+        profile=profile, data={"expanded_experience_ids": experience_ids}
+    )
+    form.full_clean()
+    return loader.render_to_string(
+        "main/print.html", {"profile": profile, "form": form, "index_path": "/"}
+    )
+
+
+def fetch_static(url: str) -> dict:
+    """Lets WeasyPrint read stylesheets and fonts from static files instead of HTTP."""
+    from weasyprint import default_url_fetcher
+
+    path = urlsplit(url).path
+    static_url = "/" + settings.STATIC_URL.lstrip("/")
+    if path.startswith(static_url):
+        name = path.removeprefix(static_url)
+        file = (
+            staticfiles_storage.path(name)
+            if staticfiles_storage.exists(name)
+            else finders.find(name)
+        )
+        if file:
+            return default_url_fetcher(Path(file).as_uri())
+    return default_url_fetcher(url)
+
+
+class PrintExports:
+    """
+    Print exports of profiles under `root`, one file per content version, so a file
+    never changes once written and can be cached forever. Exports are rendered by a
+    background job that runs `manage.py export_print` in a separate process, since
+    rendering a PDF takes seconds of CPU that would stall every greenlet of the worker.
+    """
+
+    def __init__(self, root: Path, url: str):
+        self.root = Path(root)
+        self.url = url
+
+    def versions(self, profile_id: int) -> dict[int, str]:
+        """Exported versions of the profile this deploy can serve, and their file
+        names."""
+        versions = {}
+        for path in self.root.glob(f"profile-{profile_id}-v*.*"):
+            if (match := name_re.fullmatch(path.name)) and is_servable(match):
+                versions[int(match["version"])] = path.name
+        return versions
+
+    def url_for(self, profile_id: int, version: int) -> tuple[str | None, bool]:
+        """URL of the export of `version`, or of the newest older one; and whether it
+        is current."""
+        for format in ("pdf", "html"):
+            name = export_name(profile_id, version, format)
+            # 요청 시점의 비용은 파일 하나의 stat이다.
+            if (self.root / name).exists():
+                return self.url + name, True
+        versions = self.versions(profile_id)
+        if not versions:
+            return None, False
+        return self.url + versions[max(versions)], False
+
+    def schedule(self, profile_id: int):
+        """Queues an export of the profile's current version, unless one is queued."""
+        render_export.enqueue(
+            dedup_key=f"print_export:{profile_id}", profile_id=profile_id
+        )
+
+    def export(self, profile: Profile) -> Path:
+        """Renders `profile` (with its tree prefetched) and removes older versions and
+        exports of other deploys."""
+        format = export_format()
+        html = render_print(profile)
+        path = self.root / export_name(profile.id, profile.content_version, format)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # 다른 프로세스가 반쯤 쓴 파일을 서빙하지 않도록 옮겨서 쓴다.
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as file:
+            if format == "pdf":
+                from weasyprint import HTML
+
+                HTML(
+                    string=html, base_url="http://localhost/", url_fetcher=fetch_static
+                ).write_pdf(file)
+            else:
+                file.write(html.encode())
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+        for other in self.root.glob(f"profile-{profile.id}-v*.*"):
+            match = name_re.fullmatch(other.name)
+            if other != path and (
+                match is None or int(match["version"]) <= profile.content_version
+            ):
+                other.unlink(missing_ok=True)
+        return path
+
+
+print_exports = PrintExports(
+    root=settings.PRINT_EXPORT_ROOT, url=settings.PRINT_EXPORT_URL
+)
+
+
+@task("print_export", max_attempts=3)
+def render_export(profile_id: int):
+    version = Profile.objects.values_list("content_version", flat=True).get(
+        pk=profile_id
+    )
+    if print_exports.url_for(profile_id, version)[1]:
+        return
+    subprocess.run(
+        [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "export_print",
+            "--profile-id",
+            str(profile_id),
+        ],
+        cwd=settings.BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
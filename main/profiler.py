@@ -0,0 +1,212 @@
+import itertools
+import os
+import signal
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.http import Http404, HttpRequest, HttpResponse
+from django.template.response import TemplateResponse
+from greenlet import getcurrent
+
+MAX_DEPTH = 128
+
+token_signer = signing.TimestampSigner(salt="main.profiler")
+
+
+class ProfilerUnavailable(Exception):
+    pass
+
+
+@dataclass
+class Profile:
+    id: int
+    label: str
+    started: float
+    duration: float = 0.0
+    # 창(window) 프로파일의 time.monotonic() 마감 시각
+    until: float | None = None
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format of flamegraph.pl and speedscope, root first."""
+        return "".join(
+            ";".join(map(frame_label, stack)) + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+
+def frame_label(code: CodeType) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """
+    A CPU sampling profiler driven by SIGPROF (`setitimer(ITIMER_PROF)`), so it costs
+    nothing while no profile is recording. The handler runs on the main thread in
+    whichever greenlet holds the CPU, so a request profile only counts the samples of
+    its own greenlet, while a window profile counts every greenlet. Finished profiles
+    are kept in memory, the last `max_profiles` of them.
+    """
+
+    def __init__(self, interval: float, max_profiles: int):
+        self.interval = interval
+        self.profiles: deque[Profile] = deque(maxlen=max_profiles)
+        self.requests: dict = {}
+        self.window: Profile | None = None
+        self.ids = itertools.count(1)
+        self.running = False
+
+    def sample(self, signum: int, frame: FrameType | None):
+        if frame is None:
+            return
+        profile = self.requests.get(getcurrent())
+        window = self.window
+        if window is not None and time.monotonic() >= window.until:
+            self.stop_window()
+            window = None
+        if profile is None and window is None:
+            return
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack = tuple(reversed(stack))
+        for recording in (profile, window):
+            if recording is not None:
+                recording.stacks[stack] += 1
+
+    def start_timer(self):
+        if self.running:
+            return
+        try:
+            signal.signal(signal.SIGPROF, self.sample)
+        except ValueError:
+            # 시그널 핸들러는 메인 스레드에서만 설치할 수 있다(runserver의 요청 스레드 등).
+            raise ProfilerUnavailable(
+                "signal handlers can only be set on the main thread"
+            ) from None
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop_timer(self):
+        if self.running and not self.requests and self.window is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            self.running = False
+
+    def finish(self, profile: Profile):
+        profile.duration = time.time() - profile.started
+        self.profiles.append(profile)
+
+    def start_request(self, label: str) -> Profile:
+        profile = Profile(id=next(self.ids), label=label, started=time.time())
+        self.requests[getcurrent()] = profile
+        try:
+            self.start_timer()
+        except ProfilerUnavailable:
+            del self.requests[getcurrent()]
+            raise
+        return profile
+
+    def stop_request(self, profile: Profile):
+        for greenlet, recording in list(self.requests.items()):
+            if recording is profile:
+                del self.requests[greenlet]
+        self.finish(profile)
+        self.stop_timer()
+
+    def start_window(self, seconds: float) -> Profile:
+        self.stop_window()
+        self.window = Profile(
+            id=next(self.ids),
+            label=f"window of {seconds:g}s",
+            started=time.time(),
+            until=time.monotonic() + seconds,
+        )
+        try:
+            self.start_timer()
+        except ProfilerUnavailable:
+            self.window = None
+            raise
+        return self.window
+
+    def stop_window(self):
+        window, self.window = self.window, None
+        if window is not None:
+            self.finish(window)
+            self.stop_timer()
+
+    def get(self, profile_id: int) -> Profile | None:
+        return next((p for p in self.profiles if p.id == profile_id), None)
+
+
+profiler = SamplingProfiler(
+    interval=settings.PROFILER_INTERVAL_SECONDS,
+    max_profiles=settings.PROFILER_MAX_PROFILES,
+)
+
+
+def is_profile_token(value: str) -> bool:
+    try:
+        token_signer.unsign(value, max_age=settings.PROFILER_TOKEN_MAX_AGE_SECONDS)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+@staff_member_required
+def profiler_view(request: HttpRequest) -> HttpResponse:
+    token = None
+    if request.method == "POST":
+        action = request.POST.get("action")
+        try:
+            if action == "start":
+                seconds = min(
+                    float(request.POST.get("seconds") or 10),
+                    settings.PROFILER_MAX_WINDOW_SECONDS,
+                )
+                profiler.start_window(seconds)
+            elif action == "stop":
+                profiler.stop_window()
+            elif action == "token":
+                token = token_signer.sign("profile")
+        except (ValueError, ProfilerUnavailable) as e:
+            messages.error(request, str(e))
+
+    # 마감이 지난 창은 샘플이 더 오지 않아도 여기서 닫는다.
+    if profiler.window is not None and time.monotonic() >= profiler.window.until:
+        profiler.stop_window()
+    return TemplateResponse(
+        request,
+        "admin/main/profiler.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Profiler",
+            "profiles": list(reversed(profiler.profiles)),
+            "window": profiler.window,
+            "token": token,
+            "token_max_age": settings.PROFILER_TOKEN_MAX_AGE_SECONDS,
+            "max_window": settings.PROFILER_MAX_WINDOW_SECONDS,
+        },
+    )
+
+
+@staff_member_required
+def profile_download(request: HttpRequest, profile_id: int) -> HttpResponse:
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise Http404("no such profile")
+    response = HttpResponse(profile.collapsed(), content_type="text/plain")
+    response["Content-Disposition"] = (
+        f'attachment; filename="profile-{profile.id}.collapsed.txt"'
+    )
+    return response
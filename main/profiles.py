@@ -0,0 +1,80 @@
+import datetime
+import threading
+import time
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+
+from .models import Profile
+
+
+class ProfileRouter:
+    """Resolves a request to a profile id by its `/p/<slug>/` path or by its host,
+    falling back to `DEFAULT_PROFILE_SLUG`. Lookups are kept in memory for `ttl`
+    seconds, misses included, so a host without a profile does not cost a query on
+    every request."""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.ids: dict[tuple[str, str], tuple[int | None, float]] = {}
+
+    def resolve(self, request: HttpRequest, slug: str | None = None) -> int:
+        if slug is not None:
+            lookups = [("slug", slug)]
+        else:
+            host = request.get_host().rsplit(":", 1)[0].lower()
+            lookups = [("host", host), ("slug", settings.DEFAULT_PROFILE_SLUG)]
+        for lookup in lookups:
+            if (profile_id := self.lookup(*lookup)) is not None:
+                return profile_id
+        raise Http404("no profile")
+
+    def lookup(self, field: str, value: str) -> int | None:
+        now = time.monotonic()
+        with self.lock:
+            cached = self.ids.get((field, value))
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+        profile_id = (
+            Profile.objects.filter(**{field: value})
+            .values_list("id", flat=True)
+            .first()
+        )
+        with self.lock:
+            # 임의의 서브도메인으로 요청해도 캐시가 끝없이 커지지 않게 한다.
+            if len(self.ids) >= self.max_entries:
+                self.ids.clear()
+            self.ids[(field, value)] = (profile_id, now)
+        return profile_id
+
+    def invalidate(self):
+        """Forgets every resolved id in this process; other processes wait for `ttl`."""
+        with self.lock:
+            self.ids.clear()
+
+
+profile_router = ProfileRouter(ttl=settings.PROFILE_ROUTER_TTL_SECONDS)
+
+
+def resolve_profile(view: Callable[..., HttpResponse]):
+    """Sets `request.profile_id` before calling `view`."""
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, slug: str | None = None):
+        request.profile_id = profile_router.resolve(request, slug)
+        return view(request)
+
+    return wrapper
+
+
+def profile_version(request: HttpRequest) -> tuple[int, datetime.datetime]:
+    """`(content_version, modified)` of the resolved profile, queried once per request."""
+    if not hasattr(request, "profile_version"):
+        request.profile_version = Profile.objects.values_list(
+            "content_version", "modified"
+        ).get(pk=request.profile_id)
+    return request.profile_version
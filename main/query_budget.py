@@ -0,0 +1,132 @@
+import logging
+import random
+import re
+from collections import Counter as ShapeCounter
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+violations = Counter(
+    "query_budget_violations_total", "Requests that exceeded their query budget."
+)
+sampled_queries = Counter(
+    "query_budget_queries_total", "Queries executed by requests sampled for budgets."
+)
+
+placeholder_list_re = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql: str) -> str:
+    """Parameters are already placeholders; only collapse `IN (%s, %s, ...)` lists."""
+    return placeholder_list_re.sub("%s, ...", sql)
+
+
+@dataclass
+class QueryRecorder:
+    shapes: ShapeCounter = field(default_factory=ShapeCounter)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[query_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def total(self) -> int:
+        return sum(self.shapes.values())
+
+    def repeated(self) -> dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+
+@dataclass
+class QueryBudget:
+    total: int
+    repeats: int = 1
+    targets: dict[str, int] = field(default_factory=dict)
+
+    def limit_for(self, hx_target: str) -> tuple[str, int]:
+        """Returns the matching target pattern, used as the metric label, and its limit."""
+        for pattern, limit in self.targets.items():
+            if re.fullmatch(pattern, hx_target):
+                return pattern, limit
+        return "", self.total
+
+    def check(self, view_name: str, hx_target: str, recorder: QueryRecorder):
+        pattern, limit = self.limit_for(hx_target)
+        repeated = {
+            shape: count
+            for shape, count in recorder.repeated().items()
+            if count > self.repeats
+        }
+        labels = {"view": view_name, "target": pattern}
+        sampled_queries.inc(recorder.total, **labels)
+        if recorder.total <= limit and not repeated:
+            return
+
+        violations.inc(**labels)
+        message = (
+            f"{view_name} (HX-Target: {hx_target or '-'}) ran {recorder.total} queries, "
+            f"budget {limit}"
+        )
+        if repeated:
+            message += "; repeated: " + "; ".join(
+                f"{count}x {shape}" for shape, count in repeated.items()
+            )
+        if settings.QUERY_BUDGET_ACTION == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def query_budget(
+    total: int, repeats: int = 1, targets: dict[str, int] | None = None
+) -> Callable:
+    """
+    Declares how many queries a view may run, optionally per HX-Target (regex patterns
+    matched against the whole header), and how often one query shape may repeat before
+    it counts as an N+1. A sampled share of requests (`QUERY_BUDGET_SAMPLE_RATE`) is
+    recorded; violations are logged or raised according to `QUERY_BUDGET_ACTION`.
+    Queries run while a streaming response is consumed are included.
+    """
+    budget = QueryBudget(total=total, repeats=repeats, targets=targets or {})
+
+    def decorator(view: Callable[..., HttpResponse]):
+        view_name = f"{view.__module__}.{view.__name__}"
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs):
+            if random.random() >= settings.QUERY_BUDGET_SAMPLE_RATE:
+                return view(request, *args, **kwargs)
+
+            recorder = QueryRecorder()
+            hx_target = request.headers.get("HX-Target", "")
+            with connection.execute_wrapper(recorder):
+                response = view(request, *args, **kwargs)
+            if not response.streaming:
+                budget.check(view_name, hx_target, recorder)
+                return response
+
+            content = response.streaming_content
+
+            def iterate():
+                with connection.execute_wrapper(recorder):
+                    yield from content
+                budget.check(view_name, hx_target, recorder)
+
+            response.streaming_content = iterate()
+            return response
+
+        wrapper.query_budget = budget
+        return wrapper
+
+    return decorator
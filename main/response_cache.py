@@ -0,0 +1,226 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, connections
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    response: HttpResponse
+    keys: list[str]
+    rendered_at: float
+    stored_at: float
+
+    def is_fresh(self, invalidated_at: dict[str, float]) -> bool:
+        """Fresh unless one of its surrogate keys was invalidated after the render
+        started, or the TTL has passed."""
+        return (
+            all(invalidated_at.get(key, 0) < self.rendered_at for key in self.keys)
+            and time.time() - self.stored_at < settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+
+
+def canonical_query(query_string: str) -> str:
+    """The query de-duplicated and sorted, numbers by value, as
+    `ProfileForm.canonical_query_string` writes it."""
+    pairs = set(parse_qsl(query_string, keep_blank_values=True))
+    return urlencode(
+        sorted(
+            pairs,
+            key=lambda pair: (
+                (pair[0], 0, int(pair[1]), "")
+                if pair[1].isdigit()
+                else (pair[0], 1, 0, pair[1])
+            ),
+        )
+    )
+
+
+def cache_key(request: HttpRequest) -> str | None:
+    """None unless the raw query is already canonical: the view answers other
+    spellings of the same query with a redirect or `HX-Replace-Url`, which a cached
+    response of the canonical URL would skip."""
+    query = request.META.get("QUERY_STRING", "")
+    if query != canonical_query(query):
+        return None
+    hx_target = request.headers.get("HX-Target", "")
+    # 호스트마다 다른 프로필을 서빙하므로 호스트도 키에 넣는다.
+    digest = hashlib.md5(
+        f"{request.get_host()}{request.path}?{query}#{hx_target}".encode()
+    ).hexdigest()
+    return f"response_cache:{digest}"
+
+
+class SingleFlight:
+    """Lets only one caller per key run `fn`; concurrent callers wait for it instead."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events: dict[str, threading.Event] = {}
+
+    def acquire(self, key: str) -> threading.Event | None:
+        """Returns None if the caller won the flight, else the event to wait on."""
+        with self.lock:
+            if key in self.events:
+                return self.events[key]
+            self.events[key] = threading.Event()
+            return None
+
+    def release(self, key: str):
+        with self.lock:
+            event = self.events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+class ResponseCache:
+    """Entries are partitioned by the `Surrogate-Key`s of their response, so
+    invalidating one profile's keys leaves every other profile's entries fresh."""
+
+    def __init__(self):
+        self.flights = SingleFlight()
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    def invalidation_key(self, surrogate_key: str) -> str:
+        return f"response_cache:invalidated:{surrogate_key}"
+
+    def invalidate(self, surrogate_keys: list[str]):
+        """Marks entries tagged with any of `surrogate_keys` stale. Stale entries are
+        still served while revalidating."""
+        now = time.time()
+        self.cache.set_many(
+            {self.invalidation_key(key): now for key in surrogate_keys},
+            timeout=settings.RESPONSE_CACHE_STALE_TTL_SECONDS,
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        invalidation_keys = {self.invalidation_key(key): key for key in entry.keys}
+        invalidated_at = self.cache.get_many(list(invalidation_keys))
+        return entry.is_fresh(
+            {invalidation_keys[key]: at for key, at in invalidated_at.items()}
+        )
+
+    def get(self, key: str) -> CacheEntry | None:
+        return self.cache.get(key)
+
+    def set(self, key: str, response: HttpResponse, rendered_at: float):
+        self.cache.set(
+            key,
+            CacheEntry(
+                response=response,
+                keys=response.get("Surrogate-Key", "").split(),
+                rendered_at=rendered_at,
+                stored_at=time.time(),
+            ),
+            timeout=settings.RESPONSE_CACHE_STALE_TTL_SECONDS,
+        )
+
+    def regenerate(
+        self,
+        key: str,
+        request: HttpRequest,
+        get_response: Callable[[HttpRequest], HttpResponse],
+        is_cacheable: Callable[[HttpResponse], bool],
+    ) -> HttpResponse | None:
+        """Renders and stores `key`. If another caller is already rendering it, waits
+        for that caller instead and returns None."""
+        if (event := self.flights.acquire(key)) is not None:
+            event.wait(timeout=settings.RESPONSE_CACHE_LOCK_TIMEOUT_SECONDS)
+            return None
+        return self.render_and_store(key, request, get_response, is_cacheable)
+
+    def regenerate_in_background(
+        self,
+        key: str,
+        request: HttpRequest,
+        get_response: Callable[[HttpRequest], HttpResponse],
+        is_cacheable: Callable[[HttpResponse], bool],
+    ):
+        """Starts rendering `key` in the background unless it is already in flight."""
+        if self.flights.acquire(key) is not None:
+            return
+
+        def run():
+            close_old_connections()
+            try:
+                self.render_and_store(
+                    key, request, get_response, is_cacheable, background=True
+                )
+            except Exception:
+                logger.exception("background regeneration failed: %s", key)
+            finally:
+                connections.close_all()
+
+        # gunicorn.conf.py의 monkey.patch_all()로 인해 스레드는 greenlet으로 실행된다.
+        threading.Thread(target=run, daemon=True).start()
+
+    def render_and_store(
+        self,
+        key: str,
+        request: HttpRequest,
+        get_response: Callable[[HttpRequest], HttpResponse],
+        is_cacheable: Callable[[HttpResponse], bool],
+        background: bool = False,
+    ) -> HttpResponse:
+        release = True
+        try:
+            rendered_at = time.time()
+            response = get_response(request)
+            if is_cacheable(response):
+                if not response.streaming:
+                    self.set(key, response, rendered_at)
+                elif background:
+                    self.set(key, materialize(response), rendered_at)
+                else:
+                    # 스트리밍 응답은 클라이언트에게 보내면서 모아 두었다가, 끝까지 보낸 뒤에 저장한다.
+                    response.streaming_content = self.tee(key, response, rendered_at)
+                    release = False
+            return response
+        finally:
+            if release:
+                self.flights.release(key)
+
+    def tee(self, key: str, response: StreamingHttpResponse, rendered_at: float):
+        # 바깥 미들웨어(압축 등)가 응답 헤더를 바꾸기 전의 헤더를 저장한다.
+        status, headers = response.status_code, list(response.items())
+        streaming_content = response.streaming_content
+
+        def iterate():
+            chunks = []
+            try:
+                for chunk in streaming_content:
+                    chunks.append(chunk)
+                    yield chunk
+                materialized = HttpResponse(b"".join(chunks), status=status)
+                for header, value in headers:
+                    materialized[header] = value
+                self.set(key, materialized, rendered_at)
+            finally:
+                self.flights.release(key)
+
+        return iterate()
+
+
+def materialize(response: StreamingHttpResponse) -> HttpResponse:
+    materialized = HttpResponse(
+        b"".join(response.streaming_content), status=response.status_code
+    )
+    for header, value in response.items():
+        materialized[header] = value
+    return materialized
+
+
+response_cache = ResponseCache()
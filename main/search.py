@@ -0,0 +1,58 @@
+import re
+import unicodedata
+from collections.abc import Iterable
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import Value
+
+from .models import Experience
+
+word_re = re.compile(r"\w+")
+
+
+def ngrams(text: str) -> list[str]:
+    """
+    Splits `text` into overlapping bigrams of each word. Postgres' parsers do not
+    segment Korean, where one spacing unit carries particles and compounds
+    ("결제서비스를", "결제"), so every word is indexed by its bigrams and a query
+    matches when all of its bigrams are present.
+    """
+    grams = []
+    for word in word_re.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(word) <= 2:
+            grams.append(word)
+        else:
+            grams.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def search_query(text: str) -> SearchQuery | None:
+    terms = []
+    for gram in dict.fromkeys(ngrams(text)):
+        # 한 글자 단어는 그 글자로 시작하는 bigram과 모두 맞도록 prefix로 찾는다.
+        terms.append(f"{gram}:*" if len(gram) == 1 else gram)
+    if not terms:
+        return None
+    # ngrams()는 \w만 남기므로 tsquery 연산자가 섞이지 않는다.
+    return SearchQuery(" & ".join(terms), search_type="raw", config="simple")
+
+
+def document(experience: Experience) -> str:
+    """Text of the experience and its whole duty tree, as bigrams."""
+    texts = [experience.company_name, experience.story, *experience.positions]
+    for duty in experience.duty_set.all():
+        texts.append(duty.title)
+        for item in duty.dutyitem_set.all():
+            texts.append(item.title)
+            texts.extend(subitem.title for subitem in item.dutysubitem_set.all())
+    return " ".join(dict.fromkeys(gram for text in texts for gram in ngrams(text)))
+
+
+def update_search_vectors(experience_ids: Iterable[int]):
+    experiences = Experience.objects.filter(pk__in=experience_ids).prefetch_related(
+        "duty_set__dutyitem_set__dutysubitem_set"
+    )
+    for experience in experiences:
+        Experience.objects.filter(pk=experience.pk).update(
+            search_vector=SearchVector(Value(document(experience)), config="simple")
+        )
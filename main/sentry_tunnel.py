@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+
+from django.conf import settings
+from django.http import HttpRequest
+
+from .jobs import task
+from .metrics import Counter
+
+envelopes = Counter(
+    "sentry_tunnel_envelopes_total",
+    "Envelopes received by /sentry_tunnel, by outcome "
+    "(queued, forwarded, rejected, rate_limited, deduplicated, too_large).",
+)
+
+
+class BoundedDict(OrderedDict):
+    """Forgets the least recently used key beyond `max_size` keys."""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def touch(self, key, default):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        self[key] = default
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+        return default
+
+
+def envelope_items(envelope: bytes) -> Iterator[tuple[dict, bytes]]:
+    """Yields `(item header, payload)` of each item after the envelope header."""
+    position = envelope.find(b"\n") + 1
+    while 0 < position < len(envelope):
+        end = envelope.find(b"\n", position)
+        end = len(envelope) if end == -1 else end
+        header = json.loads(envelope[position:end])
+        position = end + 1
+        if "length" in header:
+            end = position + header["length"]
+        else:
+            end = envelope.find(b"\n", position)
+            end = len(envelope) if end == -1 else end
+        yield header, envelope[position:end]
+        # 길이가 주어진 payload 뒤에도 줄바꿈이 올 수 있다.
+        position = end + 1 if envelope[end : end + 1] == b"\n" else end
+
+
+def fingerprint(event: dict) -> str:
+    """Identifies an error regardless of which browser sent it or when."""
+    parts = []
+    for exception in (event.get("exception") or {}).get("values") or []:
+        frames = (exception.get("stacktrace") or {}).get("frames") or []
+        parts.append(
+            [
+                exception.get("type"),
+                exception.get("value"),
+                [
+                    (frame.get("filename"), frame.get("function"), frame.get("lineno"))
+                    for frame in frames[-5:]
+                ],
+            ]
+        )
+    if not parts:
+        message = event.get("message") or event.get("logentry") or ""
+        parts.append(message.get("message") if isinstance(message, dict) else message)
+    parts.append(event.get("release"))
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def client_address(request: HttpRequest) -> str:
+    """The address the outermost trusted proxy saw: the `TRUSTED_PROXY_HOPS`th entry of
+    X-Forwarded-For from the right. Entries left of it are whatever the client sent."""
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded = [
+        address.strip()
+        for address in request.headers.get("X-Forwarded-For", "").split(",")
+        if address.strip()
+    ]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    # 프록시를 모두 거치지 않은 요청(헬스 체크 등)은 직접 접속한 주소로 센다.
+    return request.META.get("REMOTE_ADDR", "")
+
+
+class TunnelGuard:
+    """
+    Decides whether an envelope is forwarded upstream. Each client gets a token
+    bucket of `burst` envelopes refilled at `rate` per second, and an event whose
+    fingerprint was already forwarded `dedup_limit` times within the sliding
+    `dedup_window` seconds is dropped. Clients and fingerprints are tracked in LRU
+    dicts of at most `max_keys` entries each, so an error storm from many browsers
+    keeps memory bounded.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        dedup_window: float,
+        dedup_limit: int,
+        max_keys: int,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.dedup_window = dedup_window
+        self.dedup_limit = dedup_limit
+        self.lock = threading.Lock()
+        self.buckets = BoundedDict(max_keys)
+        self.fingerprints = BoundedDict(max_keys)
+
+    def retry_after(self, client: str) -> float:
+        """Takes a token of `client`'s bucket, returning 0, or the seconds until one refills."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.touch(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self.buckets[client] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self.buckets[client] = (tokens - 1, now)
+            return 0
+
+    def is_duplicate(self, envelope: bytes) -> bool:
+        """True when every event in `envelope` is a duplicate. Envelopes without
+        events (transactions, sessions, client reports) are never duplicates."""
+        try:
+            events = [
+                json.loads(payload)
+                for header, payload in envelope_items(envelope)
+                if header.get("type") == "event"
+            ]
+        except ValueError:
+            return False
+        if not events:
+            return False
+
+        now = time.monotonic()
+        duplicate = True
+        with self.lock:
+            for event in events:
+                sent = self.fingerprints.touch(
+                    fingerprint(event), deque(maxlen=self.dedup_limit)
+                )
+                if len(sent) < self.dedup_limit or now - sent[0] > self.dedup_window:
+                    sent.append(now)
+                    duplicate = False
+        return duplicate
+
+
+tunnel_guard = TunnelGuard(
+    rate=settings.SENTRY_TUNNEL_RATE_PER_SECOND,
+    burst=settings.SENTRY_TUNNEL_BURST,
+    dedup_window=settings.SENTRY_TUNNEL_DEDUP_WINDOW_SECONDS,
+    dedup_limit=settings.SENTRY_TUNNEL_DEDUP_LIMIT,
+    max_keys=settings.SENTRY_TUNNEL_MAX_KEYS,
+)
+
+
+@task("sentry_forward", max_attempts=3)
+def forward_envelope(project_id: str, envelope: str):
+    """Posts a base64 encoded envelope upstream, retrying on throttling and outages."""
+    import requests
+
+    response = requests.post(
+        f"{settings.SENTRY_TUNNEL_UPSTREAM}/api/{project_id}/envelope/",
+        base64.b64decode(envelope),
+        timeout=settings.SENTRY_TUNNEL_TIMEOUT_SECONDS,
+    )
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    # 그 밖의 4xx는 다시 보내도 같은 결과이므로 버린다.
+    envelopes.inc(outcome="forwarded" if response.ok else "rejected")
@@ -0,0 +1,42 @@
+import functools
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import loader
+
+TEMPLATE_NAME = "main/sw.js"
+
+
+def precache_urls() -> list[str]:
+    """Hashed URLs of the static files in the manifest that match
+    SERVICE_WORKER_PRECACHE. Empty before collectstatic."""
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None) or {}
+    patterns = [re.compile(pattern) for pattern in settings.SERVICE_WORKER_PRECACHE]
+    return sorted(
+        settings.STATIC_URL + hashed_name
+        for name, hashed_name in hashed_files.items()
+        if any(pattern.search(name) for pattern in patterns)
+    )
+
+
+@functools.cache
+def service_worker_script() -> tuple[str, str]:
+    """The service worker and its cache version. The version hashes the whole static
+    manifest and the script's template, so every deploy that changes either of them
+    installs a new worker with new caches."""
+    template = loader.get_template(TEMPLATE_NAME)
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None) or {}
+    digest = hashlib.sha256(json.dumps(hashed_files, sort_keys=True).encode())
+    digest.update(template.template.source.encode())
+    version = digest.hexdigest()[:12]
+    script = template.render(
+        {
+            "version": version,
+            "precache": json.dumps(precache_urls(), indent=2),
+            "static_url": settings.STATIC_URL,
+        }
+    )
+    return version, script
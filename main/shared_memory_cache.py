@@ -0,0 +1,325 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b"GHSHMC01"
+# magic, buckets, data size, head, tail
+HEADER = struct.Struct("<8sQQQQ")
+HEADER_SIZE = 64
+HEAD_OFFSET = 24
+TAIL_OFFSET = 32
+# key hash (0 = empty), record position, record length, expiry (0 = never)
+SLOT = struct.Struct("<QQQd")
+# record magic, key length, value length, crc32 of key and value, key hash
+RECORD = struct.Struct("<IIIIQ")
+# padding magic, bytes to skip up to the end of the ring
+PADDING = struct.Struct("<II")
+RECORD_MAGIC = 0x52454331
+PADDING_MAGIC = 0x50414421
+PROBES = 8
+
+
+def align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") | 1
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    A cache shared by every process on the host through one memory-mapped file, so
+    preloaded gunicorn workers share entries instead of warming a LocMem each.
+
+    The file holds a hash index (open addressing over a window of `PROBES` slots)
+    and a ring buffer of records. Readers take no lock: they copy a record and then
+    check it was neither overwritten (its position is still behind the ring's tail)
+    nor torn (crc32). Writers are serialized by a thread lock and an `flock` on a
+    descriptor opened per process, since forked workers must not share one.
+
+    Memory is bounded by `SIZE`. Writing evicts the oldest records of the ring, but
+    a record read since it was written gets a second chance and is moved to the
+    head (CLOCK); a full probe window evicts its first unreferenced slot the same
+    way.
+
+    OPTIONS: `SIZE` in bytes of the ring (default 32 MiB) and `BUCKETS` (65536).
+    LOCATION is a file path, or a name placed in /dev/shm (or the temp directory).
+    """
+
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.data_size = align(int(options.get("SIZE", 32 * 1024 * 1024)))
+        self.buckets = int(options.get("BUCKETS", 65536))
+        self.max_record_size = self.data_size // 4
+        directory = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+        self.path = (
+            location
+            if os.path.isabs(location)
+            else os.path.join(
+                directory or tempfile.gettempdir(), location or "django-cache"
+            )
+        )
+        self.index_offset = HEADER_SIZE
+        self.refs_offset = self.index_offset + self.buckets * SLOT.size
+        self.data_offset = align(self.refs_offset + self.buckets)
+        self.file_size = self.data_offset + self.data_size
+        self.pid = None
+
+    # 프로세스마다(fork 이후에도) 파일을 새로 열어야 flock이 프로세스 사이에서 배타적으로 동작한다.
+    def ensure_open(self):
+        if self.pid == os.getpid():
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.fd = fd
+        self.lock = threading.Lock()
+        with self.lock, self.file_lock():
+            if os.fstat(fd).st_size != self.file_size:
+                os.ftruncate(fd, self.file_size)
+            self.mm = mmap.mmap(fd, self.file_size)
+            magic, buckets, data_size, _, _ = HEADER.unpack_from(self.mm, 0)
+            if (magic, buckets, data_size) != (MAGIC, self.buckets, self.data_size):
+                self.reset()
+        self.pid = os.getpid()
+
+    @contextmanager
+    def file_lock(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def write_lock(self):
+        self.ensure_open()
+        with self.lock, self.file_lock():
+            yield
+
+    def reset(self):
+        self.mm[self.index_offset : self.data_offset] = bytes(
+            self.data_offset - self.index_offset
+        )
+        HEADER.pack_into(self.mm, 0, MAGIC, self.buckets, self.data_size, 0, 0)
+
+    # 헤더와 인덱스
+
+    def read_position(self, offset: int) -> int:
+        return struct.unpack_from("<Q", self.mm, offset)[0]
+
+    def write_position(self, offset: int, value: int):
+        struct.pack_into("<Q", self.mm, offset, value)
+
+    def slot_offset(self, slot: int) -> int:
+        return self.index_offset + slot * SLOT.size
+
+    def read_slot(self, slot: int) -> tuple[int, int, int, float]:
+        return SLOT.unpack_from(self.mm, self.slot_offset(slot))
+
+    def write_slot(
+        self, slot: int, hash: int, position: int, length: int, expires: float
+    ):
+        SLOT.pack_into(self.mm, self.slot_offset(slot), hash, position, length, expires)
+
+    def window(self, hash: int):
+        base = hash % self.buckets
+        return [(base + i) % self.buckets for i in range(PROBES)]
+
+    def find_slot(self, hash: int, position: int | None = None) -> int | None:
+        for slot in self.window(hash):
+            slot_hash, slot_position, _, _ = self.read_slot(slot)
+            if slot_hash == hash and (position is None or slot_position == position):
+                return slot
+        return None
+
+    def choose_slot(self, hash: int) -> int:
+        window = self.window(hash)
+        for slot in window:
+            if self.read_slot(slot)[0] in (0, hash):
+                return slot
+        for slot in window:
+            if not self.mm[self.refs_offset + slot]:
+                return slot
+            self.mm[self.refs_offset + slot] = 0
+        return window[0]
+
+    # 링 버퍼
+
+    def read_record(self, hash: int, key: bytes, position: int, length: int):
+        """Copies and validates a record without locking; None if it is gone or torn."""
+        if not (RECORD.size <= length <= self.max_record_size):
+            return None
+        if position < self.read_position(
+            TAIL_OFFSET
+        ) or position + length > self.read_position(HEAD_OFFSET):
+            return None
+        start = self.data_offset + position % self.data_size
+        record = self.mm[start : start + length]
+        # 복사하는 동안 writer가 이 위치를 덮어쓰기 시작했다면 tail이 이미 지나갔다.
+        if position < self.read_position(TAIL_OFFSET):
+            return None
+        magic, key_length, value_length, crc, record_hash = RECORD.unpack_from(record)
+        body = record[RECORD.size : RECORD.size + key_length + value_length]
+        if (
+            magic != RECORD_MAGIC
+            or record_hash != hash
+            or len(body) != key_length + value_length
+            or zlib.crc32(body) != crc
+            or body[:key_length] != key
+        ):
+            return None
+        return body[key_length:]
+
+    def make_room(self, size: int, second_chances: list, budget: list[int]):
+        head = self.read_position(HEAD_OFFSET)
+        tail = self.read_position(TAIL_OFFSET)
+        while head + size - tail > self.data_size:
+            start = self.data_offset + tail % self.data_size
+            magic, length = PADDING.unpack_from(self.mm, start)
+            if magic not in (RECORD_MAGIC, PADDING_MAGIC) or not length:
+                # 깨진 링은 복구하지 않고 head는 그대로 둔 채 전부 버린다.
+                self.mm[self.index_offset : self.data_offset] = bytes(
+                    self.data_offset - self.index_offset
+                )
+                self.write_position(TAIL_OFFSET, head)
+                return
+            if magic == RECORD_MAGIC:
+                _, key_length, value_length, _, hash = RECORD.unpack_from(
+                    self.mm, start
+                )
+                length = align(RECORD.size + key_length + value_length)
+                slot = self.find_slot(hash, tail)
+                if slot is not None:
+                    _, _, _, expires = self.read_slot(slot)
+                    referenced = self.mm[self.refs_offset + slot]
+                    if referenced and length <= budget[0] and not self.expired(expires):
+                        budget[0] -= length
+                        self.mm[self.refs_offset + slot] = 0
+                        second_chances.append(
+                            (hash, bytes(self.mm[start : start + length]), expires)
+                        )
+                    self.write_slot(slot, 0, 0, 0, 0)
+            tail += length
+            # 덮어쓰기 전에 tail을 먼저 옮겨서, 읽는 쪽이 덮어써진 레코드를 버리게 한다.
+            self.write_position(TAIL_OFFSET, tail)
+
+    def append(
+        self, hash: int, record: bytes, expires: float, second_chances: list, budget
+    ):
+        head = self.read_position(HEAD_OFFSET)
+        remaining = self.data_size - head % self.data_size
+        if len(record) > remaining:
+            # 레코드가 링 끝에서 잘리지 않도록 남은 자리를 건너뛴다.
+            self.make_room(remaining, second_chances, budget)
+            PADDING.pack_into(
+                self.mm,
+                self.data_offset + head % self.data_size,
+                PADDING_MAGIC,
+                remaining,
+            )
+            head += remaining
+            self.write_position(HEAD_OFFSET, head)
+        self.make_room(len(record), second_chances, budget)
+        start = self.data_offset + head % self.data_size
+        self.mm[start : start + len(record)] = record
+        self.write_position(HEAD_OFFSET, head + len(record))
+        slot = self.choose_slot(hash)
+        self.mm[self.refs_offset + slot] = 0
+        self.write_slot(slot, hash, head, len(record), expires)
+
+    def store(self, key: bytes, value: bytes, expires: float):
+        hash = key_hash(key)
+        if (slot := self.find_slot(hash)) is not None:
+            self.write_slot(slot, 0, 0, 0, 0)
+        body = key + value
+        record = RECORD.pack(RECORD_MAGIC, len(key), len(value), zlib.crc32(body), hash)
+        record += body + bytes(align(len(record) + len(body)) - len(record) - len(body))
+        if len(record) > self.max_record_size:
+            return
+        second_chances: list = []
+        budget = [self.data_size // 4]
+        self.append(hash, record, expires, second_chances, budget)
+        while second_chances:
+            hash, record, expires = second_chances.pop(0)
+            self.append(hash, record, expires, second_chances, budget)
+
+    def lookup(self, key: bytes) -> tuple[int, bytes] | None:
+        hash = key_hash(key)
+        for slot in self.window(hash):
+            slot_hash, position, length, expires = self.read_slot(slot)
+            if slot_hash != hash or self.expired(expires):
+                continue
+            value = self.read_record(hash, key, position, length)
+            if value is not None:
+                self.mm[self.refs_offset + slot] = 1
+                return slot, value
+        return None
+
+    def expired(self, expires: float) -> bool:
+        return bool(expires) and expires <= time.time()
+
+    def expiry(self, timeout) -> float:
+        timeout = self.get_backend_timeout(timeout)
+        return 0.0 if timeout is None else timeout
+
+    # Django cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.ensure_open()
+        found = self.lookup(key.encode())
+        if found is None:
+            return default
+        return pickle.loads(found[1])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.write_lock():
+            self.store(key.encode(), value, self.expiry(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.write_lock():
+            if self.lookup(key.encode()) is not None:
+                return False
+            self.store(key.encode(), value, self.expiry(timeout))
+            return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self.write_lock():
+            if (found := self.lookup(key.encode())) is None:
+                return False
+            hash, position, length, _ = self.read_slot(found[0])
+            self.write_slot(found[0], hash, position, length, self.expiry(timeout))
+            return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self.write_lock():
+            if (found := self.lookup(key.encode())) is None:
+                return False
+            self.write_slot(found[0], 0, 0, 0, 0)
+            return True
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.ensure_open()
+        return self.lookup(key.encode()) is not None
+
+    def clear(self):
+        with self.write_lock():
+            self.reset()
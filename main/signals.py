@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cdn import experience_key, profile_key, purge_queue, schedule_static_export
+from .models import Profile, Experience, Duty, DutyItem, DutySubitem
+from .print_export import print_exports
+from .profiles import profile_router
+from .response_cache import response_cache
+from .search import update_search_vectors
+
+
+class PendingChanges:
+    """Purges and reindexes collected until the transaction commits, so saving a tree
+    of N objects costs one version bump and purge per profile. Registered as the
+    transaction's on_commit callback, which Django drops on rollback together with
+    what was collected. Changes from a rolled-back savepoint inside the transaction
+    are still flushed, which only invalidates more than needed."""
+
+    def __init__(self):
+        self.keys: dict[int, set[str]] = defaultdict(set)
+        self.reindex: set[int] = set()
+
+    def __call__(self):
+        if not self.keys and not self.reindex:
+            return
+
+        # 연쇄 save()가 모두 끝난 뒤에 올려야 메모리의 오래된 값에 덮이지 않는다.
+        Profile.objects.filter(pk__in=self.keys).update(
+            content_version=F("content_version") + 1
+        )
+        if self.reindex:
+            update_search_vectors(self.reindex)
+        keys = sorted(set().union(*self.keys.values()))
+        response_cache.invalidate(keys)
+        purge_queue.enqueue(keys)
+        # 내보낸 정적 페이지는 purge가 지우므로 print export처럼 다시 만든다.
+        schedule_static_export(self.keys)
+        # 한 번이라도 내보낸 적 있는 프로필만 새 버전을 미리 만든다.
+        for profile_id in self.keys:
+            if print_exports.versions(profile_id):
+                print_exports.schedule(profile_id)
+
+
+def pending_changes() -> tuple[PendingChanges, bool]:
+    """The changes of the current transaction, and whether they are new and still
+    have to be registered with on_commit."""
+    changes = getattr(connection, "pending_changes", None)
+    # 롤백이나 커밋으로 콜백이 목록에서 빠졌으면 새로 모은다.
+    if changes is not None and any(
+        func is changes for _, func, _ in connection.run_on_commit
+    ):
+        return changes, False
+    changes = connection.pending_changes = PendingChanges()
+    return changes, True
+
+
+def enqueue_purge(profile_id: int, keys: list[str]):
+    changes, is_new = pending_changes()
+    changes.keys[profile_id].update(keys)
+    # 트랜잭션 밖(autocommit)에서는 on_commit이 바로 실행하므로 모은 뒤에 등록한다.
+    if is_new:
+        transaction.on_commit(changes)
+
+
+def enqueue_reindex(experience_id: int):
+    changes, is_new = pending_changes()
+    changes.reindex.add(experience_id)
+    if is_new:
+        transaction.on_commit(changes)
+
+
+def experience_of(instance: Duty | DutyItem | DutySubitem) -> Experience | None:
+    try:
+        if isinstance(instance, Duty):
+            return instance.experience
+        if isinstance(instance, DutyItem):
+            return instance.duty.experience
+        return instance.duty_item.duty.experience
+    except ObjectDoesNotExist:
+        # 상위 객체와 함께 cascade 삭제되는 중이면 상위 객체의 purge가 이미 큐에 들어가 있다.
+        return None
+
+
+@receiver(post_save, sender=Profile)
+def purge_profile(instance: Profile, created: bool, **kwargs):
+    # 하위 객체 저장 시 연쇄적으로 호출되는 save()는 필드 변경이 없으므로 purge하지 않는다.
+    if created or instance.tracker.changed():
+        enqueue_purge(instance.id, [profile_key(instance.id)])
+    # 없던 호스트와 slug도 캐시되므로, 새 프로필도 캐시를 비운다.
+    if (
+        created
+        or instance.tracker.has_changed("slug")
+        or instance.tracker.has_changed("host")
+    ):
+        transaction.on_commit(profile_router.invalidate)
+
+
+@receiver(post_delete, sender=Profile)
+def forget_deleted_profile(instance: Profile, **kwargs):
+    transaction.on_commit(profile_router.invalidate)
+
+
+@receiver(post_save, sender=Experience)
+def purge_experience(instance: Experience, created: bool, **kwargs):
+    keys = [experience_key(instance.id)]
+    # 경력 목록(<select>의 option)이 바뀌면 프로필의 모든 fragment가 영향을 받는다.
+    if created or instance.tracker.has_changed("company_name"):
+        keys.append(profile_key(instance.profile_id))
+    enqueue_purge(instance.profile_id, keys)
+    # 하위 객체의 저장도 Experience.save()로 이어지므로 여기서 함께 색인한다.
+    enqueue_reindex(instance.id)
+
+
+@receiver(post_delete, sender=Experience)
+def purge_deleted_experience(instance: Experience, **kwargs):
+    enqueue_purge(
+        instance.profile_id,
+        [profile_key(instance.profile_id), experience_key(instance.id)],
+    )
+
+
+@receiver(post_save, sender=Duty)
+@receiver(post_save, sender=DutyItem)
+@receiver(post_save, sender=DutySubitem)
+@receiver(post_delete, sender=Duty)
+@receiver(post_delete, sender=DutyItem)
+@receiver(post_delete, sender=DutySubitem)
+def purge_experience_subtree(instance: Duty | DutyItem | DutySubitem, signal, **kwargs):
+    if (experience := experience_of(instance)) is not None:
+        enqueue_purge(experience.profile_id, [experience_key(experience.id)])
+        # 삭제는 Experience.save()로 이어지지 않으므로 따로 색인한다.
+        if signal is post_delete:
+            enqueue_reindex(experience.id)
@@ -0,0 +1,244 @@
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+# 브라우저가 고르도록 <picture>의 <source>에 넣는 순서
+VARIANT_FORMATS = {"avif": "image/avif", "webp": "image/webp"}
+RASTER_SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+svg_comment_re = re.compile(rb"<!--.*?-->", re.S)
+svg_declaration_re = re.compile(rb"<\?xml[^>]*\?>|<!DOCTYPE[^>]*>", re.S)
+svg_metadata_re = re.compile(rb"<metadata\b.*?</metadata>", re.S)
+svg_editor_element_re = re.compile(
+    rb"<(sodipodi|inkscape):[^>]*?(/>|>.*?</\1:[^>]*>)", re.S
+)
+svg_editor_attribute_re = re.compile(
+    rb"\s(?:xmlns:(?:sodipodi|inkscape)|(?:sodipodi|inkscape):[\w-]+)=\"[^\"]*\""
+)
+svg_between_tags_re = re.compile(rb">\s+<")
+# 경로 데이터의 0.5는 .5로 써도 같은 값이다.
+svg_leading_zero_re = re.compile(rb"(?<![\w.])0(\.\d)")
+svg_path_data_re = re.compile(rb"\b(d|points)=\"([^\"]*)\"")
+
+
+def minify_svg(content: bytes) -> bytes:
+    """Drops what renderers ignore: the XML declaration, comments, metadata and editor
+    data, whitespace between tags, and leading zeros in path data. Whitespace is kept
+    in SVGs with <text>, where it may be rendered."""
+    content = svg_declaration_re.sub(b"", content)
+    content = svg_comment_re.sub(b"", content)
+    content = svg_metadata_re.sub(b"", content)
+    content = svg_editor_element_re.sub(b"", content)
+    content = svg_editor_attribute_re.sub(b"", content)
+    if b"<text" not in content:
+        content = svg_between_tags_re.sub(b"><", content)
+    content = svg_path_data_re.sub(
+        lambda match: (
+            match[1] + b'="' + svg_leading_zero_re.sub(rb"\1", match[2]).strip() + b'"'
+        ),
+        content,
+    )
+    return content.strip() + b"\n"
+
+
+def optimize_png(content: bytes) -> bytes:
+    """Re-encodes losslessly at the highest zlib effort; pixels, palette,
+    transparency and ICC profile are kept."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(content)) as image:
+        output = io.BytesIO()
+        image.save(output, "PNG", optimize=True)
+    return output.getvalue()
+
+
+def encode_variant(content: bytes, format: str) -> bytes | None:
+    from PIL import Image, features
+
+    if not features.check(format):
+        return None
+    with Image.open(io.BytesIO(content)) as image:
+        output = io.BytesIO()
+        if format == "webp":
+            # 완전히 투명한 픽셀의 색만 버리므로 보이는 결과는 같다.
+            image.save(output, "WEBP", lossless=True, method=6)
+        else:
+            image.save(
+                output,
+                "AVIF",
+                quality=settings.STATIC_IMAGE_AVIF_QUALITY,
+                subsampling="4:4:4",
+                speed=4,
+            )
+    return output.getvalue()
+
+
+def variant_name(name: str, format: str) -> str:
+    return str(PurePosixPath(name).with_suffix(f".{format}"))
+
+
+@dataclass
+class ImageResult:
+    name: str
+    original: int
+    optimized: int
+    variants: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def smallest(self) -> int:
+        return min([self.optimized, *self.variants.values()])
+
+
+class ImageOptimizingStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Before files are hashed, losslessly optimises collected PNGs, minifies SVGs and
+    adds AVIF and WebP variants of PNGs and JPEGs that are smaller than the original,
+    so all of them get hashed names in the manifest. Variants are only re-encoded when
+    their source changed. The bytes saved are logged; `manage.py static_image_report`
+    lists them per file.
+    """
+
+    image_results: list[ImageResult]
+
+    def post_process(self, paths, *args, **kwargs):
+        self.image_results = []
+        if not kwargs.get("dry_run"):
+            paths = dict(paths)
+            for name in sorted(paths):
+                self.process_image(paths, name)
+            if self.image_results:
+                logger.info(
+                    "static images: %s bytes saved by optimising, %s more by variants",
+                    sum(r.original - r.optimized for r in self.image_results),
+                    sum(r.optimized - r.smallest for r in self.image_results),
+                )
+        yield from super().post_process(paths, *args, **kwargs)
+
+    def process_image(self, paths: dict, name: str):
+        suffix = PurePosixPath(name).suffix.lower()
+        if suffix not in RASTER_SUFFIXES | {".svg"}:
+            return
+        source_storage, source_path = paths[name]
+        with source_storage.open(source_path) as file:
+            original = file.read()
+        if suffix == ".svg":
+            optimized = minify_svg(original)
+        elif suffix == ".png":
+            optimized = optimize_png(original)
+        else:
+            # JPEG은 다시 인코딩하면 손실이 생기므로 그대로 둔다.
+            optimized = original
+        if len(optimized) >= len(original):
+            optimized = original
+        else:
+            self.replace(name, optimized)
+            # 해시와 압축이 원본 대신 최적화한 파일로 만들어지게 한다.
+            paths[name] = (self, name)
+        result = ImageResult(
+            name=name, original=len(original), optimized=len(optimized)
+        )
+
+        if suffix in RASTER_SUFFIXES:
+            for format in VARIANT_FORMATS:
+                variant = variant_name(name, format)
+                if variant in paths:
+                    # 같은 이름의 원본 파일이 있으면 덮어쓰지 않는다.
+                    continue
+                if self.is_stale(variant, source_storage, source_path):
+                    content = encode_variant(optimized, format)
+                    if content is None or len(content) >= len(optimized):
+                        self.delete_if_exists(variant)
+                        continue
+                    self.replace(variant, content)
+                elif not self.exists(variant):
+                    continue
+                paths[variant] = (self, variant)
+                result.variants[format] = self.size(variant)
+        self.image_results.append(result)
+
+    def is_stale(self, variant: str, source_storage, source_path: str) -> bool:
+        if not self.exists(variant):
+            return True
+        try:
+            source_modified = source_storage.get_modified_time(source_path)
+        except (NotImplementedError, OSError):
+            return True
+        return self.get_modified_time(variant) < source_modified
+
+    def replace(self, name: str, content: bytes):
+        """Writes `name` atomically, replacing a symlink left by `collectstatic --link`
+        instead of writing through it into the source file."""
+        path = Path(self.path(name))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            file.write(content)
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+
+    def delete_if_exists(self, name: str):
+        if self.exists(name):
+            self.delete(name)
+
+
+def image_report() -> list[ImageResult]:
+    """Sizes of the images found by the static finders against what `collectstatic`
+    left in STATIC_ROOT, unhashed names included."""
+    root = Path(settings.STATIC_ROOT)
+    results = []
+    seen = set()
+    for finder in finders.get_finders():
+        for path, storage in finder.list(ignore_patterns=None):
+            prefix = getattr(storage, "prefix", None)
+            name = os.path.join(prefix, path) if prefix else path
+            name = name.replace(os.sep, "/")
+            suffix = PurePosixPath(name).suffix.lower()
+            if name in seen or suffix not in RASTER_SUFFIXES | {".svg"}:
+                continue
+            seen.add(name)
+            if not (root / name).exists():
+                continue
+            result = ImageResult(
+                name=name,
+                original=storage.size(path),
+                optimized=(root / name).stat().st_size,
+            )
+            for format in VARIANT_FORMATS:
+                if (variant := root / variant_name(name, format)).exists():
+                    result.variants[format] = variant.stat().st_size
+            results.append(result)
+    return results
+
+
+@functools.cache
+def manifest_version() -> str:
+    """Hash of the static manifest; changes whenever a deploy changes a collected file."""
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None) or {}
+    digest = hashlib.sha256(json.dumps(hashed_files, sort_keys=True).encode())
+    return digest.hexdigest()[:12]
+
+
+@functools.cache
+def manifest_modified() -> datetime | None:
+    """When collectstatic wrote the static manifest, i.e. when the deployed image was
+    built. None before collectstatic."""
+    try:
+        return staticfiles_storage.manifest_storage.get_modified_time(
+            staticfiles_storage.manifest_name
+        )
+    except (AttributeError, OSError):
+        return None
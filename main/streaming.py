@@ -0,0 +1,121 @@
+import logging
+from typing import Iterator
+
+from django.http import HttpRequest
+from django.template import loader
+from django.template.base import Node, NodeList, TextNode
+from django.template.context import Context, make_context
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY,
+    BlockContext,
+    BlockNode,
+    ExtendsNode,
+)
+
+from .templatetags.streaming import FlushNode
+
+logger = logging.getLogger(__name__)
+
+
+def iter_render(
+    template_name: str, context: dict, request: HttpRequest | None = None
+) -> Iterator[str]:
+    """
+    Renders a template like `loader.render_to_string`, but yields the output rendered
+    so far at every `{% flush %}`. Descends into `{% extends %}` and `{% block %}`
+    the same way Django's own nodes render them, so flush markers inside blocks work.
+    """
+    backend_template = loader.get_template(template_name)
+    template = backend_template.template
+    context = make_context(
+        context, request, autoescape=backend_template.backend.engine.autoescape
+    )
+    buffer: list[str] = []
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for chunk in iter_nodelist(template.nodelist, context):
+                if chunk is None:
+                    if buffer:
+                        yield "".join(buffer)
+                        buffer = []
+                else:
+                    buffer.append(chunk)
+    if buffer:
+        yield "".join(buffer)
+
+
+def abort_on_error(chunks: Iterator[str], name: str) -> Iterator[str]:
+    """
+    Passes `chunks` through, logging an error raised after the first chunk before
+    re-raising it. The 200 status line has been sent by then, so the server aborts the
+    connection instead of completing the response, and the truncated page is never
+    stored by the response cache or a CDN.
+    """
+    sent = False
+    try:
+        for chunk in chunks:
+            yield chunk
+            sent = True
+    except Exception:
+        if sent:
+            # 로그는 Sentry로도 간다.
+            logger.exception("streamed render of %s failed after the first chunk", name)
+        raise
+
+
+def iter_nodelist(nodelist: NodeList, context: Context) -> Iterator[str | None]:
+    """Yields rendered strings, and None where the output should be flushed."""
+    for node in nodelist:
+        yield from iter_node(node, context)
+
+
+def iter_node(node: Node, context: Context) -> Iterator[str | None]:
+    if isinstance(node, FlushNode):
+        yield None
+    elif isinstance(node, ExtendsNode):
+        yield from iter_extends(node, context)
+    elif isinstance(node, BlockNode):
+        yield from iter_block(node, context)
+    else:
+        yield node.render_annotated(context)
+
+
+def iter_extends(node: ExtendsNode, context: Context) -> Iterator[str | None]:
+    # ExtendsNode.render와 동일하다.
+    compiled_parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in compiled_parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks(
+                    {
+                        n.name: n
+                        for n in compiled_parent.nodelist.get_nodes_by_type(BlockNode)
+                    }
+                )
+            break
+    with context.render_context.push_state(compiled_parent, isolated_context=False):
+        yield from iter_nodelist(compiled_parent.nodelist, context)
+
+
+def iter_block(node: BlockNode, context: Context) -> Iterator[str | None]:
+    # BlockNode.render와 동일하다.
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context["block"] = node
+            yield from iter_nodelist(node.nodelist, context)
+        else:
+            push = block = block_context.pop(node.name)
+            if block is None:
+                block = node
+            block = type(node)(block.name, block.nodelist)
+            block.context = context
+            context["block"] = block
+            yield from iter_nodelist(block.nodelist, context)
+            if push is not None:
+                block_context.push(node.name, push)
@@ -0,0 +1,101 @@
+import re
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+from django.templatetags.static import StaticNode
+from template_partials.templatetags.partials import DefinePartialNode, TemplateProxy
+
+from .metrics import Counter
+
+# (template, kind, name) -> [count, seconds, bytes]
+RequestTimings = dict[tuple[str, str, str], list[float]]
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+render_count = Counter(
+    "template_render_count_total", "Number of template, partial, block and tag renders"
+)
+render_seconds = Counter(
+    "template_render_seconds_total",
+    "Wall time spent rendering, including nested renders",
+)
+render_bytes = Counter("template_render_bytes_total", "Bytes of rendered output")
+
+
+def record(template: str, kind: str, name: str, seconds: float, output: str):
+    labels = {"template": template, "kind": kind, "name": name}
+    render_count.inc(**labels)
+    render_seconds.inc(seconds, **labels)
+    render_bytes.inc(len(output), **labels)
+    if (timings := request_timings.get()) is not None:
+        stats = timings.setdefault((template, kind, name), [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += len(output)
+
+
+def timed(kind: str, describe):
+    def decorator(render):
+        @wraps(render)
+        def wrapper(self, context, *args, **kwargs):
+            start = time.perf_counter()
+            output = render(self, context, *args, **kwargs)
+            if (described := describe(self, context)) is not None:
+                template, name = described
+                record(template, kind, name, time.perf_counter() - start, output)
+            return output
+
+        wrapper.__wrapped_by_template_timing__ = True
+        return wrapper
+
+    return decorator
+
+
+def template_name(origin) -> str:
+    # Template("...")처럼 문자열로 만든 템플릿은 이름이 없다.
+    return origin.template_name or "<string>"
+
+
+def page_name(context) -> str:
+    template = context.template
+    return template_name(template.origin) if template is not None else ""
+
+
+def install():
+    """Wraps the render methods of templates, partials, blocks and `{% static %}`."""
+    if getattr(Template.render, "__wrapped_by_template_timing__", False):
+        return
+
+    Template.render = timed(
+        "template", lambda self, context: (template_name(self.origin), "")
+    )(Template.render)
+    TemplateProxy.render = timed(
+        "partial", lambda self, context: (template_name(self.origin), self.name)
+    )(TemplateProxy.render)
+    DefinePartialNode.render = timed(
+        "partial",
+        lambda self, context: (
+            (template_name(self.origin), self.partial_name) if self.inline else None
+        ),
+    )(DefinePartialNode.render)
+    BlockNode.render = timed(
+        "block", lambda self, context: (page_name(context), self.name)
+    )(BlockNode.render)
+    StaticNode.render = timed(
+        "tag", lambda self, context: (page_name(context), "static")
+    )(StaticNode.render)
+
+
+def server_timing_header(timings: RequestTimings, limit: int = 20) -> str:
+    entries = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    metrics = []
+    for (template, kind, name), (count, seconds, size) in entries[:limit]:
+        metric = re.sub(r"[^\w.-]", "_", f"{kind}.{name or template}")
+        desc = f"{template} count={count} bytes={size}"
+        metrics.append(f'{metric};dur={seconds * 1000:.2f};desc="{desc}"')
+    return ", ".join(metrics)
@@ -0,0 +1,134 @@
+{% autoescape off %}// main.service_worker가 만든다. 버전은 정적 파일 manifest와 이 템플릿의 해시다.
+const VERSION = "{{ version }}";
+const PRECACHE = {{ precache }};
+const STATIC_URL = "{{ static_url }}";
+const STATIC_CACHE = `static-${VERSION}`;
+const PAGE_CACHE = `pages-${VERSION}`;
+const FRAGMENT_CACHE = `fragments-${VERSION}`;
+const PAGE_PATH = /^\/(p\/[-\w]+\/)?$/;
+const FRAGMENT_TARGET = /^experience-\d+-(details|expand)$/;
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches
+      .open(STATIC_CACHE)
+      .then((cache) => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting()),
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  // 이전 배포의 페이지는 이제 없는 해시 이름의 정적 파일을 가리키므로 함께 버린다.
+  event.waitUntil(
+    caches
+      .keys()
+      .then((names) =>
+        Promise.all(
+          names
+            .filter((name) => !name.endsWith(`-${VERSION}`))
+            .map((name) => caches.delete(name)),
+        ),
+      )
+      .then(() => self.clients.claim()),
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== self.location.origin) {
+    return;
+  }
+  if (url.pathname.startsWith(STATIC_URL)) {
+    event.respondWith(cacheFirst(event, request));
+    return;
+  }
+  if (!PAGE_PATH.test(url.pathname)) {
+    return;
+  }
+  const target = request.headers.get("HX-Target");
+  if (target === null && url.search === "") {
+    event.respondWith(staleWhileRevalidate(event, url.pathname));
+  } else if (target !== null && FRAGMENT_TARGET.test(target)) {
+    event.respondWith(fragment(event, request, url, target));
+  }
+});
+
+// 배포마다 캐시를 새로 만들므로 해시가 없는 이름도 그 배포 안에서는 바뀌지 않는다.
+async function cacheFirst(event, request) {
+  const cache = await caches.open(STATIC_CACHE);
+  const cached = await cache.match(request);
+  if (cached) {
+    return cached;
+  }
+  const response = await fetch(request);
+  if (response.ok) {
+    event.waitUntil(cache.put(request, response.clone()));
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event, path) {
+  const cache = await caches.open(PAGE_CACHE);
+  const cached = await cache.match(path);
+  // HTTP 캐시를 거쳐 재검증하므로 바뀌지 않은 페이지는 ETag로 304만 받는다.
+  // 새 버전의 캐시가 비어 있으면 HTTP 캐시의 이전 배포 페이지를 쓰지 않고 다시 받는다.
+  const mode = cached ? "no-cache" : "reload";
+  const fresh = fetch(path, { cache: mode }).then((response) => {
+    if (response.ok && !response.redirected) {
+      event.waitUntil(storePage(cache, path, response.clone(), cached));
+    }
+    return response;
+  });
+  if (!cached) {
+    return fresh;
+  }
+  event.waitUntil(fresh.catch(() => undefined));
+  return cached;
+}
+
+async function storePage(cache, path, response, cached) {
+  await cache.put(path, response);
+  const version = response.headers.get("ETag");
+  if (cached && cached.headers.get("ETag") !== version) {
+    await evictFragments(path, version);
+  }
+}
+
+// fragment는 그 페이지의 ETag(내용 버전)별로 캐시한다. 페이지의 ETag가 바뀌면 이전 버전의 것은 쓰이지 않는다.
+async function fragment(event, request, url, target) {
+  const page = await caches.match(url.pathname, { cacheName: PAGE_CACHE });
+  const version = page && page.headers.get("ETag");
+  if (!version) {
+    return fetch(request);
+  }
+  const cache = await caches.open(FRAGMENT_CACHE);
+  const key = fragmentKey(url, target, version);
+  const cached = await cache.match(key);
+  if (cached) {
+    return cached;
+  }
+  const response = await fetch(request);
+  if (response.ok && !response.redirected) {
+    event.waitUntil(cache.put(key, response.clone()));
+  }
+  return response;
+}
+
+function fragmentKey(url, target, version) {
+  const key = new URL(url);
+  key.searchParams.set("__sw_target", target);
+  key.searchParams.set("__sw_version", version);
+  return key.href;
+}
+
+async function evictFragments(path, version) {
+  const cache = await caches.open(FRAGMENT_CACHE);
+  for (const request of await cache.keys()) {
+    const key = new URL(request.url);
+    if (key.pathname === path && key.searchParams.get("__sw_version") !== version) {
+      await cache.delete(request);
+    }
+  }
+}
+{% endautoescape %}
\ No newline at end of file
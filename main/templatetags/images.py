@@ -0,0 +1,43 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.storage import VARIANT_FORMATS, variant_name
+
+register = template.Library()
+
+
+def collected(name: str) -> bool:
+    # manifest가 있으면 stat 없이 확인한다.
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None)
+    if hashed_files:
+        return name in hashed_files
+    return staticfiles_storage.exists(name)
+
+
+@register.simple_tag
+def picture(name: str, **attrs) -> str:
+    """
+    A static image as `<picture>` with a `<source>` per AVIF/WebP variant collectstatic
+    made of it, smallest format first; the `<img>` gets `attrs`. Without variants, as
+    for SVGs or before collectstatic, it is a plain `<img>`.
+
+    Usage:
+
+        {% picture "main/photo.png" alt="" class="w-24" %}
+    """
+    img = format_html('<img src="{}"{}>', static(name), flatatt(attrs))
+    sources = [
+        (mime_type, static(variant))
+        for format, mime_type in VARIANT_FORMATS.items()
+        if collected(variant := variant_name(name, format))
+    ]
+    if not sources:
+        return img
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join("", '<source type="{}" srcset="{}">', sources),
+        img,
+    )
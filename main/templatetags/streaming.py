@@ -0,0 +1,21 @@
+from django import template
+
+register = template.Library()
+
+
+class FlushNode(template.Node):
+    def render(self, context):
+        return ""
+
+
+@register.tag
+def flush(parser, token):
+    """
+    Marks a point where `main.streaming.iter_render` sends everything rendered so far
+    to the client. Renders nothing in a normal render.
+
+    Usage:
+
+        {% flush %}
+    """
+    return FlushNode()
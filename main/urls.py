@@ -1,9 +1,23 @@
 from django.urls import path
 
-from .views import index, sentry_tunnel
+from .views import (
+    index,
+    print_file,
+    print_profile,
+    search,
+    sentry_tunnel,
+    service_worker,
+)
 
 app_name = "main"
 urlpatterns = [
     path("sentry_tunnel", sentry_tunnel, name="sentry_tunnel"),
+    path("sw.js", service_worker, name="service_worker"),
     path("", index, name="index"),
+    path("search", search, name="search"),
+    path("p/<slug:slug>/", index, name="profile"),
+    path("p/<slug:slug>/search", search, name="profile_search"),
+    path("print", print_profile, name="print"),
+    path("p/<slug:slug>/print", print_profile, name="profile_print"),
+    path("print/<str:name>", print_file, name="print_file"),
 ]
@@ -1,65 +1,268 @@
 import re
 import json
-import requests
-from urllib.parse import urlparse, ParseResult
+import base64
+import math
+import datetime
+from urllib.parse import urlencode, urlparse, ParseResult
 from django.core.exceptions import BadRequest
-from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import redirect
 from django.template import loader
-from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import last_modified
+from django.views.decorators.http import condition
 from django.views.decorators.vary import vary_on_headers
 from django.views.decorators.cache import cache_control
 
+from .cdn import experience_key, profile_key
 from .forms import ProfileForm
-from .models import Profile
+from .models import Profile, Experience
+from .print_export import name_re, print_exports
+from .profiles import profile_version, resolve_profile
+from .query_budget import query_budget
+from .search import search_query
+from .sentry_tunnel import client_address, envelopes, forward_envelope, tunnel_guard
+from .service_worker import service_worker_script
+from .storage import manifest_modified, manifest_version
+from .streaming import abort_on_error, iter_render
+
+
+def get_profile_tree(**lookup) -> Profile:
+    return Profile.objects.prefetch_related(
+        "experience_set__duty_set__dutyitem_set__dutysubitem_set",
+    ).get(**lookup)
+
 
+def render_index(request: HttpRequest, profile: Profile, form: ProfileForm) -> str:
+    return loader.render_to_string(
+        template_name="main/index.html",
+        context={"profile": profile, "form": form, "index_path": request.path},
+        request=request,
+    )
 
+
+def render_experience_fragment(
+    experience: Experience, form: ProfileForm, index_path: str = "/"
+) -> str:
+    render_results = [
+        loader.render_to_string(
+            template_name="main/index.html#experience_details",
+            context={
+                "experience": experience,
+                "form": form,
+                "index_path": index_path,
+            },
+        ),
+        loader.render_to_string(
+            template_name="main/index.html#select", context={"form": form}
+        ),
+    ]
+    return "\n".join(render_results)
+
+
+def stream_index(request: HttpRequest, profile_id: int) -> StreamingHttpResponse:
+    """
+    Sends the document head and header before running the prefetch queries, then the
+    career section once its data arrives. Only for the canonical page without query,
+    which never needs a redirect.
+    """
+    # Surrogate-Key는 본문보다 먼저 보내야 하므로 id만 한 번에 조회한다.
+    experience_ids = list(
+        Experience.objects.filter(profile_id=profile_id).values_list("id", flat=True)
+    )
+    profile = SimpleLazyObject(lambda: get_profile_tree(pk=profile_id))
+    form = SimpleLazyObject(lambda: ProfileForm(profile=profile, data=None))
+
+    response = StreamingHttpResponse(
+        abort_on_error(
+            iter_render(
+                "main/index.html",
+                context={"profile": profile, "form": form, "index_path": request.path},
+                request=request,
+            ),
+            name=request.path,
+        )
+    )
+    response["Surrogate-Key"] = " ".join(
+        [profile_key(profile_id)] + [experience_key(id) for id in experience_ids]
+    )
+    return response
+
+
+def profile_etag(request: HttpRequest) -> str:
+    # 프로필마다 따로 올라가는 content_version이므로, 한 프로필의 수정이 다른 프로필의 ETag를 바꾸지 않는다.
+    # 페이지가 해시된 정적 파일 이름을 담고 있으므로 정적 파일이 바뀐 배포도 ETag를 바꾼다.
+    version, _ = profile_version(request)
+    return f'W/"profile-{request.profile_id}-v{version}-{manifest_version()}"'
+
+
+def profile_last_modified(request: HttpRequest) -> datetime.datetime:
+    modified = profile_version(request)[1]
+    deployed = manifest_modified()
+    return max(modified, deployed) if deployed else modified
+
+
+@resolve_profile
+@query_budget(7, targets={r"experience-\d+-(details|expand)": 6})
 @cache_control(s_maxage=3600, stale_while_revalidated=60)
 @vary_on_headers("HX-Target")
-@last_modified(
-    lambda req: Profile.objects.only("modified").get(email="getogrand@hey.com").modified
+@condition(
+    etag_func=profile_etag,
+    last_modified_func=profile_last_modified,
 )
 def index(request: HttpRequest) -> HttpResponse:
-    profile = Profile.objects.prefetch_related(
-        "experience_set__duty_set__dutyitem_set__dutysubitem_set",
-    ).get(email="getogrand@hey.com")
+    if (
+        settings.INDEX_STREAMING_ENABLED
+        and not request.GET
+        and not request.headers.get("HX-Target")
+    ):
+        return stream_index(request, profile_id=request.profile_id)
+
+    profile = get_profile_tree(pk=request.profile_id)
 
     form = ProfileForm(profile=profile, data=request.GET if request.GET else None)
     form.full_clean()
 
     hx_target = request.headers.get("HX-Target")
 
+    # 순서가 다르거나, 중복되거나, 존재하지 않는 id가 섞인 쿼리는 CDN 캐시를 쪼개므로 정규화된 URL로 모은다.
+    canonical_query_string = form.canonical_query_string()
+    canonical_url = (
+        f"{request.path}?{canonical_query_string}"
+        if canonical_query_string
+        else request.path
+    )
+    is_canonical = request.META.get("QUERY_STRING", "") == canonical_query_string
+
     if not hx_target:
-        return render(
-            request=request,
-            template_name="main/index.html",
-            context={"profile": profile, "form": form},
+        if not is_canonical:
+            return redirect(canonical_url)
+        response = HttpResponse(render_index(request, profile, form))
+        response["Surrogate-Key"] = " ".join(
+            [profile_key(profile.id)]
+            + [experience_key(e.id) for e in profile.experience_set.all()]
         )
+        return response
 
     if target_match := re.search(r"experience-(\d+)-(details|expand)", hx_target):
         experience_id = target_match.group(1)
-        experience = profile.experience_set.get(pk=int(experience_id))
-        render_results = [
-            loader.render_to_string(
-                template_name="main/index.html#experience_details",
-                context={
-                    "experience": experience,
-                    "form": form,
-                },
-            ),
-            loader.render_to_string(
-                template_name="main/index.html#select", context={"form": form}
-            ),
-        ]
-        return HttpResponse("\n".join(render_results))
+        # prefetch된 목록에서 찾아야 하위 항목까지 추가 쿼리 없이 렌더링된다.
+        experience = next(
+            (e for e in profile.experience_set.all() if e.id == int(experience_id)),
+            None,
+        )
+        if experience is None:
+            raise Experience.DoesNotExist
+        response = HttpResponse(
+            render_experience_fragment(experience, form, request.path)
+        )
+        # 미리 불러온 fragment를 클릭했을 때 브라우저 캐시에서 바로 쓸 수 있게 한다.
+        patch_cache_control(response, max_age=settings.FRAGMENT_BROWSER_MAX_AGE_SECONDS)
+        response["Surrogate-Key"] = " ".join(
+            [profile_key(profile.id), experience_key(experience.id)]
+        )
+        if not is_canonical:
+            response["HX-Replace-Url"] = canonical_url
+        return response
     else:
         raise Exception(f"unknown target: {hx_target}")
 
 
+@resolve_profile
+@query_budget(1)
+@cache_control(private=True, max_age=60)
+def search(request: HttpRequest) -> HttpResponse:
+    """Live search over the profile's experiences and their duty trees, linking to the
+    page with only the matching experiences expanded."""
+    text = request.GET.get("q", "").strip()[: settings.SEARCH_QUERY_MAX_LENGTH]
+    query = search_query(text)
+    experiences = (
+        list(
+            Experience.objects.filter(
+                profile_id=request.profile_id, search_vector=query
+            )
+            .only("id", "company_name")
+            .order_by("id")
+        )
+        if query
+        else []
+    )
+    return HttpResponse(
+        loader.render_to_string(
+            template_name="main/index.html#search_results",
+            context={
+                "query": text,
+                "experiences": experiences,
+                "index_path": request.path.removesuffix("search"),
+                "expanded_query": urlencode(
+                    {"expanded_experience_ids": [e.id for e in experiences]},
+                    doseq=True,
+                ),
+            },
+        )
+    )
+
+
+@resolve_profile
+@query_budget(3)
+@cache_control(no_cache=True)
+def print_profile(request: HttpRequest) -> HttpResponse:
+    """Redirects to the print export of the profile's current content version. While
+    a background job renders it, the previous version is served."""
+    version, _ = profile_version(request)
+    url, current = print_exports.url_for(request.profile_id, version)
+    if not current:
+        print_exports.schedule(request.profile_id)
+    if url is None:
+        response = HttpResponse(
+            "인쇄용 파일을 만들고 있습니다. 잠시 후 다시 시도해 주세요.",
+            status=503,
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Retry-After"] = "5"
+        return response
+    return redirect(url)
+
+
+def print_file(request: HttpRequest, name: str) -> FileResponse:
+    """Serves an export when the proxy does not, e.g. in development."""
+    path = settings.PRINT_EXPORT_ROOT / name
+    if not name_re.fullmatch(name) or not path.exists():
+        raise Http404("no such export")
+    response = FileResponse(path.open("rb"))
+    # 내용 버전마다 파일 이름이 달라지므로 바뀌지 않는다.
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=lambda request: f'"{service_worker_script()[0]}"')
+def service_worker(request: HttpRequest) -> HttpResponse:
+    """Served from the root so its scope covers every page. Browsers revalidate it on
+    navigation, and a deploy that changes static files changes its version."""
+    _, script = service_worker_script()
+    return HttpResponse(script, content_type="text/javascript; charset=utf-8")
+
+
 @csrf_exempt
 def sentry_tunnel(request: HttpRequest) -> HttpResponse:
+    # 큐에 넣은 envelope는 Postgres 행이 되므로 본문을 읽기 전에 크기부터 제한한다.
+    max_bytes = settings.SENTRY_TUNNEL_MAX_ENVELOPE_BYTES
+    if int(request.META.get("CONTENT_LENGTH") or 0) > max_bytes:
+        envelopes.inc(outcome="too_large")
+        return HttpResponse("", status=413)
     envelope = request.body
+    if len(envelope) > max_bytes:
+        envelopes.inc(outcome="too_large")
+        return HttpResponse("", status=413)
     piece = envelope.splitlines()[0]
     header = json.loads(piece)
     dsn: ParseResult = urlparse(header["dsn"])
@@ -71,6 +274,20 @@ def sentry_tunnel(request: HttpRequest) -> HttpResponse:
     if project_id != "4507459219685376":
         raise BadRequest(f"invalid project id: {project_id}")
 
-    upstream_sentry_url = f"https://{sentry_hostname}/api/{project_id}/envelope/"
-    requests.post(upstream_sentry_url, envelope)
+    # 에러가 반복해서 터지는 브라우저 때문에 업스트림 전송이 페이지 요청을 막지 않게 한다.
+    retry_after = tunnel_guard.retry_after(client_address(request))
+    if retry_after:
+        envelopes.inc(outcome="rate_limited")
+        response = HttpResponse("", status=429)
+        response["Retry-After"] = str(math.ceil(retry_after))
+        return response
+    if tunnel_guard.is_duplicate(envelope):
+        envelopes.inc(outcome="deduplicated")
+        return HttpResponse("")
+
+    # 업스트림 전송은 작업 큐가 재시도와 함께 맡는다.
+    forward_envelope.enqueue(
+        project_id=project_id, envelope=base64.b64encode(envelope).decode()
+    )
+    envelopes.inc(outcome="queued")
     return HttpResponse("")